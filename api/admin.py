@@ -1,6 +1,11 @@
+from datetime import datetime
+
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.functions import Concat, Left, Length, Right
+from django.db.models.lookups import GreaterThan
 from django.utils.html import format_html
 from .models import (
     UserProfile, Project, Purchase, Tender, TenderApplication, 
@@ -11,6 +16,11 @@ from .models import (
 )
 
 
+def _shortened(field):
+    """Database-side equivalent of f"{value[:8]}...{value[-8:]}"."""
+    return Concat(Left(field, 8), Value('...'), Right(field, 8), output_field=CharField())
+
+
 # --------------------
 # User Management
 # --------------------
@@ -24,12 +34,13 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'get_role', 'is_staff')
     list_filter = BaseUserAdmin.list_filter + ('profile__role',)
+    list_select_related = ('profile',)
     
     def get_role(self, obj):
-        try:
-            return obj.profile.role
-        except UserProfile.DoesNotExist:
-            return 'No Profile'
+        # Missing profiles are cached as absent by the LEFT JOIN, so this
+        # does not hit the database again.
+        profile = getattr(obj, 'profile', None)
+        return profile.role if profile else 'No Profile'
     get_role.short_description = 'Role'
 
 
@@ -40,6 +51,7 @@ admin.site.register(User, UserAdmin)
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'organization', 'phone', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('role', 'created_at')
     search_fields = ('user__username', 'user__email', 'organization')
 
@@ -82,13 +94,29 @@ class BlockchainConfigAdmin(admin.ModelAdmin):
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ('user', 'address', 'is_external', 'get_balance_display', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('is_external', 'created_at')
     search_fields = ('user__username', 'address')
     readonly_fields = ('created_at', 'get_balance_display')
     
+    def get_changelist_instance(self, request):
+        # Fetch balances for the whole page in one batched RPC instead of one
+        # eth_call per row. result_list is cached, so the rows annotated here
+        # are the ones the template renders.
+        from .blockchain import get_blockchain_manager
+        cl = super().get_changelist_instance(request)
+        try:
+            balances = get_blockchain_manager().get_balances([w.address for w in cl.result_list])
+        except Exception:
+            balances = {}
+        for wallet in cl.result_list:
+            if wallet.address in balances:
+                wallet._balance = balances[wallet.address]
+        return cl
+    
     def get_balance_display(self, obj):
         try:
-            balance = obj.get_balance()
+            balance = obj._balance if hasattr(obj, '_balance') else obj.get_balance()
             return f"{balance} CCT"
         except Exception:
             return "N/A"
@@ -101,19 +129,33 @@ class ChainBlockAdmin(admin.ModelAdmin):
     list_filter = ('timestamp',)
     search_fields = ('hash', 'previous_hash')
     readonly_fields = ('hash', 'raw')
+    list_per_page = 50
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _tx_count=Count('txs'),
+            _hash_short=Case(
+                When(hash='', then=Value('N/A')),
+                default=_shortened('hash'),
+                output_field=CharField(),
+            ),
+        )
     
     def hash_short(self, obj):
-        return f"{obj.hash[:8]}...{obj.hash[-8:]}" if obj.hash else "N/A"
+        return obj._hash_short
     hash_short.short_description = 'Hash'
+    hash_short.admin_order_field = 'hash'
     
     def transaction_count(self, obj):
-        return obj.txs.count()
+        return obj._tx_count
     transaction_count.short_description = 'Transactions'
+    transaction_count.admin_order_field = '_tx_count'
     
     def timestamp_formatted(self, obj):
-        import datetime
-        return datetime.datetime.fromtimestamp(obj.timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        return datetime.fromtimestamp(obj.timestamp).strftime('%Y-%m-%d %H:%M:%S')
     timestamp_formatted.short_description = 'Timestamp'
+    timestamp_formatted.admin_order_field = 'timestamp'
 
 
 @admin.register(ChainTransaction)
@@ -122,20 +164,42 @@ class ChainTransactionAdmin(admin.ModelAdmin):
     list_filter = ('kind', 'timestamp')
     search_fields = ('sender', 'recipient', 'tx_hash')
     readonly_fields = ('timestamp',)
+    list_per_page = 50
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _sender_short=Case(
+                When(GreaterThan(Length('sender'), 16), then=_shortened('sender')),
+                default=F('sender'),
+                output_field=CharField(),
+            ),
+            _recipient_short=Case(
+                When(GreaterThan(Length('recipient'), 16), then=_shortened('recipient')),
+                default=F('recipient'),
+                output_field=CharField(),
+            ),
+            _tx_hash_short=Case(
+                When(tx_hash='', then=Value('N/A')),
+                default=_shortened('tx_hash'),
+                output_field=CharField(),
+            ),
+        )
     
     def sender_short(self, obj):
-        return f"{obj.sender[:8]}...{obj.sender[-8:]}" if len(obj.sender) > 16 else obj.sender
+        return obj._sender_short
     sender_short.short_description = 'Sender'
+    sender_short.admin_order_field = 'sender'
     
     def recipient_short(self, obj):
-        return f"{obj.recipient[:8]}...{obj.recipient[-8:]}" if len(obj.recipient) > 16 else obj.recipient
+        return obj._recipient_short
     recipient_short.short_description = 'Recipient'
+    recipient_short.admin_order_field = 'recipient'
     
     def tx_hash_short(self, obj):
-        if obj.tx_hash:
-            return f"{obj.tx_hash[:8]}...{obj.tx_hash[-8:]}"
-        return "N/A"
+        return obj._tx_hash_short
     tx_hash_short.short_description = 'Tx Hash'
+    tx_hash_short.admin_order_field = 'tx_hash'
 
 
 # --------------------
@@ -144,9 +208,12 @@ class ChainTransactionAdmin(admin.ModelAdmin):
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ('title', 'ngo', 'status', 'credits', 'chain_issued', 'completion_percentage', 'submitted_at')
+    list_select_related = ('ngo',)
     list_filter = ('status', 'chain_issued', 'submitted_at')
     search_fields = ('title', 'location', 'ngo__username')
     readonly_fields = ('submitted_at', 'updated_at', 'completion_percentage')
+    list_per_page = 50
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -186,6 +253,7 @@ class FieldImageInline(admin.TabularInline):
 @admin.register(FieldDataSubmission)
 class FieldDataSubmissionAdmin(admin.ModelAdmin):
     list_display = ('project', 'field_officer', 'survey_date', 'hectare_area', 'soil_type', 'created_at')
+    list_select_related = ('project', 'field_officer')
     list_filter = ('soil_type', 'survey_date', 'created_at')
     search_fields = ('project__title', 'field_officer__username')
     inlines = [FieldImageInline]
@@ -203,6 +271,7 @@ class SatelliteImageInline(admin.TabularInline):
 @admin.register(SatelliteImageSubmission)
 class SatelliteImageSubmissionAdmin(admin.ModelAdmin):
     list_display = ('project', 'isro_admin', 'image_type', 'capture_date', 'satellite_name', 'measured_area', 'created_at')
+    list_select_related = ('project', 'isro_admin')
     list_filter = ('image_type', 'satellite_name', 'capture_date', 'created_at')
     search_fields = ('project__title', 'isro_admin__username')
     inlines = [SatelliteImageInline]
@@ -214,14 +283,18 @@ class SatelliteImageSubmissionAdmin(admin.ModelAdmin):
 @admin.register(Purchase)
 class PurchaseAdmin(admin.ModelAdmin):
     list_display = ('corporate', 'project', 'credits', 'price', 'timestamp')
+    list_select_related = ('corporate', 'project')
     list_filter = ('timestamp',)
     search_fields = ('corporate__username', 'project__title')
     readonly_fields = ('price', 'timestamp')
+    list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(Tender)
 class TenderAdmin(admin.ModelAdmin):
     list_display = ('title', 'corporate', 'credits_required', 'status', 'allotted_to', 'created_at')
+    list_select_related = ('corporate', 'allotted_to')
     list_filter = ('status', 'created_at')
     search_fields = ('title', 'corporate__username', 'location')
 
@@ -229,6 +302,7 @@ class TenderAdmin(admin.ModelAdmin):
 @admin.register(TenderApplication)
 class TenderApplicationAdmin(admin.ModelAdmin):
     list_display = ('tender', 'ngo', 'status', 'offered_credits', 'price_per_credit', 'created_at')
+    list_select_related = ('tender', 'ngo')
     list_filter = ('status', 'created_at')
     search_fields = ('tender__title', 'ngo__username')
 
@@ -236,44 +310,27 @@ class TenderApplicationAdmin(admin.ModelAdmin):
 # --------------------
 # Legacy Login Models
 # --------------------
-@admin.register(NGOLogin)
-class NGOLoginAdmin(admin.ModelAdmin):
-    list_display = ('email',)
-    search_fields = ('email',)
-
-
-@admin.register(CorporateLogin)
-class CorporateLoginAdmin(admin.ModelAdmin):
-    list_display = ('email',)
-    search_fields = ('email',)
-
-
-@admin.register(AdminLogin)
-class AdminLoginAdmin(admin.ModelAdmin):
-    list_display = ('email',)
-    search_fields = ('email',)
-
-
-@admin.register(FieldOfficerLogin)
-class FieldOfficerLoginAdmin(admin.ModelAdmin):
+class LegacyLoginAdmin(admin.ModelAdmin):
     list_display = ('email',)
     search_fields = ('email',)
 
 
-@admin.register(IsroAdminLogin)
-class IsroAdminLoginAdmin(admin.ModelAdmin):
-    list_display = ('email',)
-    search_fields = ('email',)
+for _login_model in (NGOLogin, CorporateLogin, AdminLogin, FieldOfficerLogin, IsroAdminLogin):
+    admin.site.register(_login_model, LegacyLoginAdmin)
 
 
 @admin.register(MobileToken)
 class MobileTokenAdmin(admin.ModelAdmin):
     list_display = ('user', 'key_short', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'key')
     readonly_fields = ('created_at',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_key_short=_shortened('key'))
+    
     def key_short(self, obj):
-        return f"{obj.key[:8]}...{obj.key[-8:]}"
+        return obj._key_short
     key_short.short_description = 'API Key'
 
 
@@ -283,6 +340,7 @@ class MobileTokenAdmin(admin.ModelAdmin):
 @admin.register(TenderV2)
 class TenderV2Admin(admin.ModelAdmin):
     list_display = ('tender_title', 'corporate', 'required_credits', 'status', 'deadline', 'created_at')
+    list_select_related = ('corporate',)
     list_filter = ('status', 'created_at', 'deadline')
     search_fields = ('tender_title', 'corporate__username')
 
@@ -290,6 +348,7 @@ class TenderV2Admin(admin.ModelAdmin):
 @admin.register(ProposalV2)
 class ProposalV2Admin(admin.ModelAdmin):
     list_display = ('tender', 'contributor', 'offered_credits', 'price_per_credit', 'status', 'created_at')
+    list_select_related = ('tender', 'contributor')
     list_filter = ('status', 'created_at')
     search_fields = ('tender__tender_title', 'contributor__username')
 
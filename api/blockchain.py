@@ -1,10 +1,15 @@
+import functools
 import hashlib
+import itertools
 import json
 import time
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from django.conf import settings
-from django.db import transaction as db_transaction
+from django.db import close_old_connections, transaction as db_transaction
+from django.utils import timezone as dj_timezone
 from web3 import Web3
 try:
     from web3.middleware import geth_poa_middleware
@@ -12,18 +17,58 @@ except ImportError:
     # For newer versions of web3.py
     from web3.middleware import ExtraDataToPOAMiddleware as geth_poa_middleware
 from eth_account import Account
+from eth_utils import event_abi_to_log_topic
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-# Import models lazily to avoid app registry issues at import time
+# Import models lazily to avoid app registry issues at import time; the
+# tuple is cached after the first successful import
+@functools.lru_cache(maxsize=1)
 def _import_models():
     from .models import ChainBlock, ChainTransaction, BlockchainConfig
     return ChainBlock, ChainTransaction, BlockchainConfig
 
 
-@dataclass
+def _get_artifact_abi(contract_name: str) -> list:
+    """Return a contract ABI from its Hardhat artifact, parsing each file only once"""
+    from pathlib import Path
+    artifact_path = Path(settings.BASE_DIR) / 'contracts' / 'artifacts' / 'contracts' / f'{contract_name}.sol' / f'{contract_name}.json'
+    if not artifact_path.exists():
+        logger.error(f"{contract_name} artifact not found at {artifact_path}")
+        return []
+    try:
+        # mtime is part of the cache key so a recompiled artifact is re-read
+        return _load_artifact_abi(str(artifact_path), artifact_path.stat().st_mtime_ns)
+    except Exception as e:
+        logger.error(f"Failed to load {contract_name} ABI: {e}")
+        return []
+
+
+@functools.lru_cache(maxsize=8)
+def _load_artifact_abi(path: str, mtime_ns: int) -> list:
+    with open(path, 'r') as f:
+        return json.load(f)['abi']
+
+
+@functools.lru_cache(maxsize=4096)
+def _to_checksum(address: str) -> str:
+    """EIP-55 checksum an address, memoized since wallet addresses repeat across calls"""
+    return Web3.to_checksum_address(address)
+
+
+# Canonical block serializer, built once instead of on every json.dumps call.
+# Output is byte-identical to json.dumps(block, sort_keys=True), so hashes of
+# already persisted blocks stay valid.
+_BLOCK_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
+@dataclass(slots=True, frozen=True)
 class Tx:
     sender: str
     recipient: str
@@ -32,16 +77,41 @@ class Tx:
     kind: str  # ISSUE or TRANSFER
     meta: Dict[str, Any] | None = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        # Shallow equivalent of dataclasses.asdict, which deep-copies every field
+        return {
+            "sender": self.sender,
+            "recipient": self.recipient,
+            "amount": self.amount,
+            "project_id": self.project_id,
+            "kind": self.kind,
+            "meta": self.meta,
+        }
+
 
 class Web3BlockchainManager:
     """Real blockchain integration using Web3.py and smart contracts"""
     
+    # Seconds a fetched gas price is reused for subsequent transactions
+    GAS_PRICE_TTL = 2.0
+    # Background workers for submit()
+    TASK_WORKERS = 4
+    
     def __init__(self):
         self.w3 = None
-        self.carbon_token_contract = None
-        self.marketplace_contract = None
+        self._carbon_token_contract = None
+        self._marketplace_contract = None
+        self._contracts_loaded = False
+        self._project_registered_topic = None
         self.account = None
         self.config = None
+        # Serializes nonce allocation for the system account across threads
+        self._tx_lock = threading.Lock()
+        self._nonce = None
+        self._gas_price = None
+        self._gas_price_at = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=self.TASK_WORKERS, thread_name_prefix="web3-task")
+        self._session = self._create_session()
         self._initialize_web3()
     
     def reload(self):
@@ -51,6 +121,14 @@ class Web3BlockchainManager:
     
     def _initialize_web3(self):
         """Initialize Web3 connection and contracts"""
+        with self._tx_lock:
+            self._nonce = None
+            self._gas_price = None
+        # Contracts are bound lazily on first use against the new connection
+        self._carbon_token_contract = None
+        self._marketplace_contract = None
+        self._contracts_loaded = False
+        self._project_registered_topic = None
         try:
             # Load blockchain configuration
             BlockchainConfig = _import_models()[2]
@@ -61,7 +139,14 @@ class Web3BlockchainManager:
                 self.config = self._create_default_local_config()
             
             # Connect to blockchain network
-            self.w3 = Web3(Web3.HTTPProvider(self.config.rpc_url))
+            # chainId and net_version never change for a provider, so web3's
+            # request cache answers them after the first call
+            self.w3 = Web3(Web3.HTTPProvider(
+                self.config.rpc_url,
+                session=self._session,
+                cache_allowed_requests=True,
+                cacheable_requests={'eth_chainId', 'net_version'},
+            ))
             
             # Add PoA middleware for local networks
             if self.config.network_type in ['local', 'sepolia', 'goerli']:
@@ -83,14 +168,25 @@ class Web3BlockchainManager:
                 self.account = Account.from_key(self.config.private_key)
                 logger.info(f"Loaded account: {self.account.address}")
             
-            # Load contract instances
-            self._load_contracts()
-            
             logger.info(f"Web3 blockchain manager initialized successfully on {self.config.network_type}")
             
         except Exception as e:
             logger.error(f"Failed to initialize Web3 blockchain manager: {e}")
     
+    @staticmethod
+    def _create_session():
+        """Pooled keep-alive HTTP session shared by every provider this manager builds"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            # Only connection failures are retried for POSTed RPC calls
+            max_retries=Retry(total=3, backoff_factor=0.1),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
     def _create_default_local_config(self):
         """Create default local blockchain configuration"""
         try:
@@ -115,8 +211,23 @@ class Web3BlockchainManager:
             logger.error(f"Failed to create default local config: {e}")
             return None
     
+    @property
+    def carbon_token_contract(self):
+        if not self._contracts_loaded:
+            self._load_contracts()
+        return self._carbon_token_contract
+
+    @property
+    def marketplace_contract(self):
+        if not self._contracts_loaded:
+            self._load_contracts()
+        return self._marketplace_contract
+
     def _load_contracts(self):
         """Load smart contract instances"""
+        if self.w3 is None or not self.config:
+            return
+        self._contracts_loaded = True
         try:
             if not self.config.carbon_token_address or not self.config.marketplace_address:
                 logger.warning("Contract addresses not configured")
@@ -127,12 +238,12 @@ class Web3BlockchainManager:
             marketplace_abi = self._get_marketplace_abi()
             
             # Create contract instances
-            self.carbon_token_contract = self.w3.eth.contract(
+            self._carbon_token_contract = self.w3.eth.contract(
                 address=self.config.carbon_token_address,
                 abi=carbon_token_abi
             )
             
-            self.marketplace_contract = self.w3.eth.contract(
+            self._marketplace_contract = self.w3.eth.contract(
                 address=self.config.marketplace_address,
                 abi=marketplace_abi
             )
@@ -144,43 +255,81 @@ class Web3BlockchainManager:
     
     def _get_carbon_token_abi(self):
         """Get Carbon Token contract ABI from compiled artifacts"""
-        try:
-            from pathlib import Path
-            from django.conf import settings
-            import json
-            
-            artifact_path = Path(settings.BASE_DIR) / 'contracts' / 'artifacts' / 'contracts' / 'CarbonCreditToken.sol' / 'CarbonCreditToken.json'
-            
-            if artifact_path.exists():
-                with open(artifact_path, 'r') as f:
-                    artifact = json.load(f)
-                    return artifact['abi']
-            else:
-                logger.error(f"Carbon Token artifact not found at {artifact_path}")
-                return []
-        except Exception as e:
-            logger.error(f"Failed to load Carbon Token ABI: {e}")
-            return []
+        return _get_artifact_abi('CarbonCreditToken')
     
     def _get_marketplace_abi(self):
         """Get Marketplace contract ABI from compiled artifacts"""
-        try:
-            from pathlib import Path
-            from django.conf import settings
-            import json
-            
-            artifact_path = Path(settings.BASE_DIR) / 'contracts' / 'artifacts' / 'contracts' / 'CarbonCreditMarketplace.sol' / 'CarbonCreditMarketplace.json'
-            
-            if artifact_path.exists():
-                with open(artifact_path, 'r') as f:
-                    artifact = json.load(f)
-                    return artifact['abi']
-            else:
-                logger.error(f"Marketplace artifact not found at {artifact_path}")
-                return []
-        except Exception as e:
-            logger.error(f"Failed to load Marketplace ABI: {e}")
-            return []
+        return _get_artifact_abi('CarbonCreditMarketplace')
+
+    def _rpc_batch(self, calls: List[tuple]) -> List[Any]:
+        """Send several JSON-RPC calls in a single HTTP round trip and return their results in order"""
+        results = []
+        for response in self.w3.provider.make_batch_request(calls):
+            if response.get('error'):
+                raise Exception(f"RPC error: {response['error']}")
+            results.append(response['result'])
+        return results
+    
+    def _next_tx_params(self):
+        """Return (gas_price, nonce) for the next system transaction; caller holds _tx_lock.
+        
+        The gas price is reused for GAS_PRICE_TTL seconds and the nonce is
+        tracked locally after the first read, so back-to-back transactions
+        usually need no extra RPC. Whatever is missing is fetched in one batch.
+        """
+        refresh_price = self._gas_price is None or time.monotonic() - self._gas_price_at > self.GAS_PRICE_TTL
+        refresh_nonce = self._nonce is None
+        calls = []
+        if refresh_price:
+            calls.append(('eth_gasPrice', []))
+        if refresh_nonce:
+            calls.append(('eth_getTransactionCount', [self.account.address, 'pending']))
+        if calls:
+            results = iter(self._rpc_batch(calls))
+            if refresh_price:
+                self._gas_price = int(next(results), 16)
+                self._gas_price_at = time.monotonic()
+            if refresh_nonce:
+                self._nonce = int(next(results), 16)
+        return self._gas_price, self._nonce
+    
+    def _send_transaction(self, contract, fn_name: str, args: list):
+        """Sign and send a contract call from the system account, returning (tx_hash, receipt)
+        
+        The calldata is ABI-encoded once and shared by the gas estimate and
+        the signed transaction.
+        """
+        call = {
+            'from': self.account.address,
+            'to': contract.address,
+            'data': contract.encode_abi(fn_name, args=args),
+            'value': 0,
+        }
+        gas_estimate = self.w3.eth.estimate_gas(call)
+        
+        with self._tx_lock:
+            gas_price, nonce = self._next_tx_params()
+            transaction = dict(
+                call,
+                gas=gas_estimate,
+                gasPrice=gas_price,
+                nonce=nonce,
+                chainId=self.w3.eth.chain_id,
+            )
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.config.private_key)
+            try:
+                tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            except Exception:
+                # Re-read the nonce from the node next time
+                self._nonce = None
+                raise
+            self._nonce = nonce + 1
+        
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            with self._tx_lock:
+                self._nonce = None
+        return tx_hash, receipt
 
     def register_project_on_chain(self, project_name: str, ngo_address: str, estimated_credits: int) -> Optional[int]:
         """Register a project on the blockchain and return the blockchain project ID"""
@@ -190,41 +339,29 @@ class Web3BlockchainManager:
         
         try:
             # Ensure address is checksum format
-            ngo_address = Web3.to_checksum_address(ngo_address)
+            ngo_address = _to_checksum(ngo_address)
             
-            # Build transaction
-            function = self.carbon_token_contract.functions.registerProject(
-                project_name, ngo_address, estimated_credits
+            # Sign, send and wait for the receipt
+            tx_hash, receipt = self._send_transaction(
+                self.carbon_token_contract, 'registerProject', [project_name, ngo_address, estimated_credits]
             )
             
-            # Estimate gas
-            gas_estimate = function.estimate_gas({'from': self.account.address})
-            
-            # Build transaction
-            transaction = function.build_transaction({
-                'from': self.account.address,
-                'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
-            
-            # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.config.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            
-            # Wait for transaction receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
             if receipt.status == 1:
-                # Parse the logs to get the project ID
+                # Parse the logs to get the project ID, decoding only the
+                # ProjectRegistered event emitted by the token contract
+                event = self.carbon_token_contract.events.ProjectRegistered()
+                if self._project_registered_topic is None:
+                    self._project_registered_topic = event_abi_to_log_topic(event.abi)
                 project_id = None
                 for log in receipt.logs:
-                    try:
-                        decoded_log = self.carbon_token_contract.events.ProjectRegistered().process_log(log)
-                        project_id = decoded_log['args']['projectId']
-                        break
-                    except:
+                    if (
+                        log['address'] != self.carbon_token_contract.address
+                        or not log['topics']
+                        or log['topics'][0] != self._project_registered_topic
+                    ):
                         continue
+                    project_id = event.process_log(log)['args']['projectId']
+                    break
                 
                 logger.info(f"Project registered on blockchain: {tx_hash.hex()}, Project ID: {project_id}")
                 return project_id
@@ -244,25 +381,12 @@ class Web3BlockchainManager:
         
         try:
             # Ensure address is checksum format
-            recipient_address = Web3.to_checksum_address(recipient_address)
+            recipient_address = _to_checksum(recipient_address)
             
-            function = self.carbon_token_contract.functions.mintCredits(
-                recipient_address, amount, project_id
+            tx_hash, receipt = self._send_transaction(
+                self.carbon_token_contract, 'mintCredits', [recipient_address, amount, project_id]
             )
             
-            gas_estimate = function.estimate_gas({'from': self.account.address})
-            
-            transaction = function.build_transaction({
-                'from': self.account.address,
-                'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
-            
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.config.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
             if receipt.status == 1:
                 logger.info(f"Credits minted on blockchain: {tx_hash.hex()}")
                 return tx_hash.hex()
@@ -282,28 +406,14 @@ class Web3BlockchainManager:
         
         try:
             # Ensure addresses are checksum format
-            from_address = Web3.to_checksum_address(from_address)
-            to_address = Web3.to_checksum_address(to_address)
+            from_address = _to_checksum(from_address)
+            to_address = _to_checksum(to_address)
             
             # Use transferCreditsFrom which allows owner to transfer on behalf of users
-            function = self.carbon_token_contract.functions.transferCreditsFrom(
-                from_address, to_address, amount, project_id
+            tx_hash, receipt = self._send_transaction(
+                self.carbon_token_contract, 'transferCreditsFrom', [from_address, to_address, amount, project_id]
             )
             
-            gas_estimate = function.estimate_gas({'from': self.account.address})
-            
-            transaction = function.build_transaction({
-                'from': self.account.address,  # System account (owner) calls the function
-                'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
-            
-            # Sign with system account (owner) private key
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.config.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
             if receipt.status == 1:
                 logger.info(f"Credits transferred on blockchain: {tx_hash.hex()}")
                 return tx_hash.hex()
@@ -322,13 +432,32 @@ class Web3BlockchainManager:
         
         try:
             # Ensure address is checksum format
-            address = Web3.to_checksum_address(address)
+            address = _to_checksum(address)
             balance = self.carbon_token_contract.functions.balanceOf(address).call()
             return balance
         except Exception as e:
             logger.error(f"Failed to get balance: {e}")
             return 0
     
+    def get_balances(self, addresses: List[str]) -> Dict[str, int]:
+        """Get token balances for many addresses in one batched JSON-RPC request"""
+        if not self.carbon_token_contract or not addresses:
+            return {}
+        
+        try:
+            token_address = self.carbon_token_contract.address
+            balances = self._rpc_batch([
+                ('eth_call', [{
+                    'to': token_address,
+                    'data': self.carbon_token_contract.encode_abi('balanceOf', args=[_to_checksum(address)]),
+                }, 'latest'])
+                for address in addresses
+            ])
+            return {address: int(balance, 16) for address, balance in zip(addresses, balances)}
+        except Exception as e:
+            logger.error(f"Failed to get batched balances, falling back to per-address calls: {e}")
+            return {address: self.get_balance(address) for address in addresses}
+    
     def create_tender_on_chain(self, title: str, description: str, credits_required: int, 
                               max_price: int, duration_days: int) -> Optional[str]:
         """Create a tender on the blockchain marketplace"""
@@ -337,23 +466,10 @@ class Web3BlockchainManager:
             return None
         
         try:
-            function = self.marketplace_contract.functions.createTender(
-                title, description, credits_required, max_price, duration_days
+            tx_hash, receipt = self._send_transaction(
+                self.marketplace_contract, 'createTender', [title, description, credits_required, max_price, duration_days]
             )
             
-            gas_estimate = function.estimate_gas({'from': self.account.address})
-            
-            transaction = function.build_transaction({
-                'from': self.account.address,
-                'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
-            
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.config.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
             if receipt.status == 1:
                 logger.info(f"Tender created on blockchain: {tx_hash.hex()}")
                 return tx_hash.hex()
@@ -364,72 +480,135 @@ class Web3BlockchainManager:
         except Exception as e:
             logger.error(f"Failed to create tender on blockchain: {e}")
             return None
+    
+    def submit(self, fn, *args, owner_id: Optional[int] = None, **kwargs) -> str:
+        """Run a blocking chain operation on the worker pool and return a task id.
+
+        ``fn`` is typically one of the ``*_on_chain`` methods or a
+        BlockchainService operation; poll :meth:`task_status` for its result.
+        The task row is written in the caller's transaction and the work
+        starts once it commits. A falsy return value (how the chain methods
+        report failure) fails the task. Only ``owner_id`` can read its status.
+        """
+        from .models import BlockchainTask
+        task = BlockchainTask.objects.create(owner_id=owner_id)
+        
+        def run():
+            state, result = 'failed', ''
+            try:
+                value = fn(*args, **kwargs)
+                if value:
+                    state, result = 'done', str(value)
+                else:
+                    logger.error(f"Blockchain task {task.pk.hex} failed: {getattr(fn, '__name__', fn)} returned no result")
+            except Exception:
+                logger.exception(f"Blockchain task {task.pk.hex} failed")
+            finally:
+                try:
+                    BlockchainTask.objects.filter(pk=task.pk).update(state=state, result=result, updated_at=dj_timezone.now())
+                finally:
+                    close_old_connections()
+        
+        db_transaction.on_commit(lambda: self._executor.submit(run))
+        return task.pk.hex
+    
+    def task_status(self, task_id: str, owner_id: Optional[int] = None) -> Dict[str, Any]:
+        """Report the state of a task started with :meth:`submit`
+
+        Another user's task is reported as unknown, and failures carry no
+        exception text; the details are in the log.
+        """
+        from django.core.exceptions import ValidationError
+        from .models import BlockchainTask
+        try:
+            task = BlockchainTask.objects.only('state', 'result').get(pk=task_id, owner_id=owner_id)
+        except (BlockchainTask.DoesNotExist, ValidationError):
+            return {'state': 'unknown'}
+        if task.state == 'failed':
+            return {'state': 'failed', 'error': 'Blockchain operation failed'}
+        if task.state == 'done':
+            return {'state': 'done', 'result': task.result}
+        return {'state': 'pending'}
 
 
 class SimpleBlockchain:
     """Ultra-light in-app blockchain for demo purposes (fallback)"""
 
+    # raw is never read: it duplicates these columns plus the tx rows
+    _BLOCK_FIELDS = ("id", "index", "timestamp", "previous_hash", "nonce", "hash")
+    _TX_FIELDS = ("sender", "recipient", "amount", "project_id", "kind", "meta")
+
     def __init__(self):
         self.chain: List[dict] = []
         self.pending: List[Tx] = []
         # Load persisted chain from DB if present, otherwise create genesis
         try:
-            ChainBlock, ChainTransaction = _import_models()[:2]
-            blocks = list(ChainBlock.objects.all().order_by("index"))
-            if blocks:
-                for b in blocks:
-                    item = b.raw or {
-                        "index": b.index,
-                        "timestamp": b.timestamp,
-                        "transactions": [],
-                        "previous_hash": b.previous_hash,
-                        "nonce": b.nonce,
-                        "hash": b.hash,
-                    }
-                    # load txs
-                    txs = []
-                    for tx in b.txs.all():
-                        txs.append({
-                            "sender": tx.sender,
-                            "recipient": tx.recipient,
-                            "amount": tx.amount,
-                            "project_id": tx.project_id,
-                            "kind": tx.kind,
-                            "meta": tx.meta,
-                        })
-                    item["transactions"] = txs
-                    self.chain.append(item)
-            else:
-                self.new_block(previous_hash="GENESIS", nonce=0)
+            ChainBlock = _import_models()[0]
+            rows = ChainBlock.objects.order_by("index").values(*self._BLOCK_FIELDS).iterator(chunk_size=200)
+            while chunk := list(itertools.islice(rows, 200)):
+                self.chain.extend(self._attach_transactions(chunk))
         except Exception:
             # If DB isn't ready (migrations not applied) fallback to in-memory genesis
+            self.chain = []
+        if not self.chain:
             self.new_block(previous_hash="GENESIS", nonce=0)
 
+    def _attach_transactions(self, rows: List[dict]) -> List[dict]:
+        """Build block dicts from ChainBlock value rows, loading all their txs in one query."""
+        ChainTransaction = _import_models()[1]
+        txs_by_block = {row["id"]: [] for row in rows}
+        txs = ChainTransaction.objects.filter(block_id__in=list(txs_by_block)).order_by("id")
+        for tx in txs.values("block_id", *self._TX_FIELDS):
+            txs_by_block[tx.pop("block_id")].append(tx)
+        return [
+            {
+                "index": row["index"],
+                "timestamp": row["timestamp"],
+                "transactions": txs_by_block[row["id"]],
+                "previous_hash": row["previous_hash"],
+                "nonce": row["nonce"],
+                "hash": row["hash"],
+            }
+            for row in rows
+        ]
+
     # ----------------- Core -----------------
     def new_block(self, nonce: int, previous_hash: str | None = None):
         block = {
             "index": len(self.chain) + 1,
             "timestamp": time.time(),
-            "transactions": [asdict(t) for t in self.pending],
-            "previous_hash": previous_hash or self.hash(self.chain[-1]),
+            "transactions": [t.to_dict() for t in self.pending],
+            # The tip's hash is stored on it, so the previous block is not re-hashed
+            "previous_hash": previous_hash or self.last_block["hash"],
             "nonce": nonce,
         }
         block["hash"] = self.hash(block)
-        # persist block and transactions
         try:
-            ChainBlock, ChainTransaction = _import_models()[:2]
-            with db_transaction.atomic():
-                b = ChainBlock.objects.create(
-                    index=block["index"],
-                    timestamp=block["timestamp"],
-                    previous_hash=block.get("previous_hash"),
-                    nonce=block["nonce"],
-                    hash=block["hash"],
-                    raw=block,
-                )
-                for tx in block["transactions"]:
-                    ChainTransaction.objects.create(
-                        block=b,
+            self._persist(block)
+        except Exception:
+            pass
+
+        self.pending = []
+        self.chain.append(block)
+        return block
+
+    def _persist(self, block: dict):
+        """Write a block and its transactions, the latter with one bulk insert."""
+        ChainBlock, ChainTransaction = _import_models()[:2]
+        with db_transaction.atomic():
+            # raw is left empty: blocks are rebuilt from these columns and
+            # their ChainTransaction rows on load
+            row = ChainBlock.objects.create(
+                index=block["index"],
+                timestamp=block["timestamp"],
+                previous_hash=block.get("previous_hash"),
+                nonce=block["nonce"],
+                hash=block["hash"],
+            )
+            ChainTransaction.objects.bulk_create(
+                [
+                    ChainTransaction(
+                        block=row,
                         sender=tx.get("sender"),
                         recipient=tx.get("recipient"),
                         amount=tx.get("amount"),
@@ -437,12 +616,10 @@ class SimpleBlockchain:
                         kind=tx.get("kind"),
                         meta=tx.get("meta"),
                     )
-        except Exception:
-            b = None
-
-        self.pending = []
-        self.chain.append(block)
-        return block
+                    for tx in block["transactions"]
+                ],
+                batch_size=500,
+            )
 
     def new_transaction(self, tx: Tx):
         self.pending.append(tx)
@@ -453,7 +630,7 @@ class SimpleBlockchain:
 
     @staticmethod
     def hash(block: dict) -> str:
-        content = json.dumps(block, sort_keys=True).encode()
+        content = _BLOCK_ENCODER.encode(block).encode()
         return hashlib.sha256(content).hexdigest()
 
     @property
@@ -471,37 +648,37 @@ class SimpleBlockchain:
         self.new_block(nonce=0)
 
 
-# Initialize blockchain managers
-web3_manager = Web3BlockchainManager()
+# Created on first use so importing this module stays free of DB and RPC access
+_web3_manager = None
+_web3_manager_lock = threading.Lock()
 
 def get_blockchain_manager():
     """Get the Web3 blockchain manager - real blockchain only"""
-    return web3_manager
+    global _web3_manager
+    if _web3_manager is None:
+        with _web3_manager_lock:
+            if _web3_manager is None:
+                _web3_manager = Web3BlockchainManager()
+    return _web3_manager
+
+def get_chain(limit: int = 200, before_ts: Optional[float] = None):
+    """Return the newest blockchain transactions from database - real blockchain only
 
-def get_chain():
-    """Return blockchain transactions from database - real blockchain only"""
+    Pass the oldest ``timestamp`` of a page (as a datetime or epoch seconds) as
+    ``before_ts`` to fetch the page that precedes it.
+    """
     try:
         from .models import ChainTransaction
-        # Return only real blockchain transactions
-        transactions = ChainTransaction.objects.filter(
-            tx_hash__isnull=False, 
-            tx_hash__gt=''
-        ).order_by('-timestamp')
-        
-        # Convert to chain format for compatibility
-        chain_data = []
-        for tx in transactions:
-            chain_data.append({
-                'sender': tx.sender,
-                'recipient': tx.recipient,
-                'amount': tx.amount,
-                'project_id': tx.project_id,
-                'kind': tx.kind,
-                'meta': tx.meta,
-                'tx_hash': tx.tx_hash,
-                'timestamp': tx.timestamp
-            })
-        
-        return chain_data
+        # Return only real blockchain transactions; tx_hash is never NULL, so
+        # a single range predicate both filters and matches the partial index
+        transactions = ChainTransaction.objects.filter(tx_hash__gt='')
+        if before_ts is not None:
+            if not isinstance(before_ts, datetime):
+                before_ts = datetime.fromtimestamp(before_ts, tz=timezone.utc)
+            transactions = transactions.filter(timestamp__lt=before_ts)
+        return list(
+            transactions.order_by('-timestamp')
+            .values('sender', 'recipient', 'amount', 'project_id', 'kind', 'meta', 'tx_hash', 'timestamp')[:limit]
+        )
     except Exception:
         return []
@@ -2,26 +2,137 @@
 Auto-setup blockchain when Django starts
 """
 import os
+import random
+import signal
+import socket
 import sys
 import subprocess
 import threading
 import time
+import functools
+import json
 import logging
+from collections import deque
 from pathlib import Path
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+LOCAL_RPC_HOST = '127.0.0.1'
+LOCAL_RPC_PORT = 8545
+LOCAL_RPC_URL = f'http://{LOCAL_RPC_HOST}:{LOCAL_RPC_PORT}'
+
+# Readiness probes reuse a pre-encoded request body
+_PROBE_BODY = json.dumps({"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}).encode()
+_PROBE_HEADERS = {'Content-Type': 'application/json'}
+
+# Printed by `hardhat node` once its JSON-RPC server is listening
+HARDHAT_READY_MARKER = 'Started HTTP and WebSocket JSON-RPC server'
+
+def _node_tool(name):
+    """Executable name for an npm-provided tool on this platform"""
+    return f'{name}.cmd' if os.name == 'nt' else name
+
+
+@functools.lru_cache(maxsize=4)
+def _load_deployment(path, mtime_ns, size):
+    """Parse a deployments/*.json file; mtime and size key the cache so rewrites are re-read"""
+    return json.loads(Path(path).read_bytes())
+
+
+@functools.cache
+def _probe_session():
+    """Keep-alive session for readiness probes, built on first use.
+
+    requests is imported here rather than at module level so importing this
+    module from AppConfig.ready() stays cheap; failures are not retried so a
+    probe against a down node returns at once.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(total=0)))
+    return session
+
+
+def _port_open(host=None, port=None, timeout=0.2):
+    """Cheap TCP check for a listener on host:port (defaults to the local node)"""
+    host = host or LOCAL_RPC_HOST
+    port = port or LOCAL_RPC_PORT
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        return sock.connect_ex((host, port)) == 0
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def _read_pid(pid_file):
+    try:
+        return int(pid_file.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    """True if pid names a running process (POSIX only; always False on Windows)"""
+    if not pid or os.name == 'nt':
+        # os.kill would terminate the process on Windows rather than probe it
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _kill_process_tree(process):
+    """Kill a process started in its own group/session along with its children"""
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        process.kill()
+
+
+def _backoff_sleep(attempt, base=1.0, cap=30.0):
+    """Sleep for a fully jittered, capped exponential backoff before retry attempt+1"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    logger.info("Retrying in %.1f seconds...", delay)
+    time.sleep(delay)
+
+
 class BlockchainAutoSetup:
     """Automatically setup blockchain when Django starts"""
     
     def __init__(self):
         self.blockchain_process = None
+        self.compile_process = None
+        # First caller of start_blockchain_and_deploy wins; later calls are no-ops
+        self._lock = threading.Lock()
+        self._started = False
+        # Last lines of Hardhat node output, for diagnosing failed starts
+        self.node_output = deque(maxlen=200)
+        # time.monotonic() of the last probe that found the node answering
+        self._alive_at = None
         self.contracts_deployed = False
         self.setup_complete = False
         
     def start_blockchain_and_deploy(self):
         """Start blockchain and deploy contracts in background"""
+        with self._lock:
+            if self._started:
+                logger.info("Blockchain auto-setup already started")
+                return
+            self._started = True
         try:
             logger.info("=== BLOCKCHAIN AUTO-SETUP STARTING ===")
             # Run in separate thread to not block Django startup
@@ -53,20 +164,9 @@ class BlockchainAutoSetup:
             if self._start_local_blockchain():
                 logger.info("Local blockchain started successfully")
                 
-                # Wait longer for blockchain to be fully ready
+                # Verify blockchain is responding properly: 3 consecutive successful checks
                 logger.info("Waiting for blockchain to be fully ready...")
-                time.sleep(10)
-                
-                # Verify blockchain is responding properly
-                ready_count = 0
-                for i in range(10):  # Try 10 times
-                    if self._check_blockchain_running():
-                        ready_count += 1
-                        if ready_count >= 3:  # Need 3 consecutive successful checks
-                            break
-                    time.sleep(2)
-                
-                if ready_count >= 3:
+                if self._wait_ready(required_consecutive=3, deadline=30):
                     logger.info("Blockchain is stable and ready")
                     
                     # Deploy contracts
@@ -88,18 +188,52 @@ class BlockchainAutoSetup:
             import traceback
             logger.error(traceback.format_exc())
     
-    def _check_blockchain_running(self):
-        """Check if blockchain is already running"""
+    def _check_blockchain_running(self, max_age=0.0):
+        """Check if blockchain is already running.
+
+        With max_age, a successful probe from the last max_age seconds is
+        trusted instead of probing again; failures are never reused.
+        """
+        if max_age and self._alive_at is not None and time.monotonic() - self._alive_at <= max_age:
+            return True
+        # Nothing listening yet: skip the JSON-RPC round-trip entirely
+        if not _port_open():
+            return False
         try:
-            import requests
-            response = requests.post(
-                'http://127.0.0.1:8545',
-                json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                timeout=2
-            )
-            return response.status_code == 200
+            response = _probe_session().post(LOCAL_RPC_URL, data=_PROBE_BODY, headers=_PROBE_HEADERS, timeout=2)
         except Exception:
             return False
+        if response.status_code != 200:
+            return False
+        self._alive_at = time.monotonic()
+        return True
+    
+    def _wait_ready(self, required_consecutive=3, deadline=60, base=0.05, factor=2, cap=1.0):
+        """Probe the node until it answers required_consecutive times in a row.
+
+        Probes back off exponentially with jitter, so a node that comes up
+        quickly is seen within a fraction of a second without hammering one
+        that is still booting. Returns False once deadline seconds pass.
+        Progress is logged at most every 5 seconds.
+        """
+        started = last_log = time.monotonic()
+        give_up_at = started + deadline
+        consecutive = 0
+        attempt = 0
+        while time.monotonic() < give_up_at:
+            if time.monotonic() - last_log >= 5:
+                last_log = time.monotonic()
+                logger.info("Waiting for blockchain to respond (%.0fs elapsed)...", last_log - started)
+            if self._check_blockchain_running():
+                consecutive += 1
+                if consecutive >= required_consecutive:
+                    return True
+            else:
+                consecutive = 0
+            attempt += 1
+            delay = min(cap, random.uniform(base, base * factor ** attempt))
+            time.sleep(max(0.0, min(delay, give_up_at - time.monotonic())))
+        return False
     
     def _start_local_blockchain(self):
         """Start local Hardhat blockchain"""
@@ -113,20 +247,25 @@ class BlockchainAutoSetup:
             
             logger.info(f"Using contracts directory: {contracts_dir}")
             
-            # Check if npm dependencies are installed
-            node_modules = contracts_dir / 'node_modules'
-            if not node_modules.exists():
+            # A node spawned before an autoreload may still be booting
+            pid_file = contracts_dir / '.hardhat.pid'
+            if _pid_alive(_read_pid(pid_file)):
+                logger.info("Hardhat node from a previous run is still starting, reusing it")
+                return self._wait_ready(required_consecutive=1, deadline=60)
+            
+            # Check if npm dependencies are installed and match the lockfile
+            if self._npm_dependencies_stale(contracts_dir):
                 logger.info("Installing npm dependencies...")
-                result = subprocess.run(
-                    'npm install',
+                install = subprocess.Popen(
+                    [_node_tool('npm'), 'ci', '--prefer-offline', '--no-audit', '--no-fund'],
                     cwd=contracts_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=120,
-                    shell=True
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True
                 )
-                if result.returncode != 0:
-                    logger.error(f"npm install failed: {result.stderr}")
+                _, stderr = install.communicate(timeout=120)
+                if install.returncode != 0:
+                    logger.error(f"npm ci failed: {stderr}")
                     return False
                 logger.info("npm dependencies installed successfully")
             else:
@@ -134,34 +273,50 @@ class BlockchainAutoSetup:
             
             logger.info("Starting Hardhat blockchain node...")
             
+            # Detach the node from Django's console/session so it outlives a reload
             if os.name == 'nt':  # Windows
-                # Use 'start' command to open a new minimized window that stays open
-                cmd = f'start "Hardhat Blockchain" /MIN cmd /k "cd /d {contracts_dir} && npx hardhat node"'
-                logger.info(f"Running: {cmd}")
-                result = os.system(cmd)
-                logger.info(f"Start command returned: {result}")
+                detach = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
             else:  # Unix/Linux
+                detach = {'start_new_session': True}
+            # Output goes to a file rather than a pipe so the node keeps running
+            # when this process exits on an autoreload
+            log_path = contracts_dir / 'hardhat-node.log'
+            with open(log_path, 'wb') as log_file:
                 self.blockchain_process = subprocess.Popen(
-                    ['npx', 'hardhat', 'node'],
+                    [_node_tool('npx'), 'hardhat', 'node'],
                     cwd=contracts_dir,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
                     stdin=subprocess.DEVNULL,
-                    start_new_session=True
+                    **detach
                 )
             
+            pid_file.write_text(str(self.blockchain_process.pid))
             logger.info("Blockchain process started")
             
-            # Wait for blockchain to start
-            for i in range(60):  # Wait up to 60 seconds
-                if i % 10 == 0:
-                    logger.info(f"Waiting for blockchain to start (attempt {i+1}/60)...")
-                if self._check_blockchain_running():
-                    logger.info("Blockchain is ready and responding!")
-                    return True
-                time.sleep(1)
+            # Compile contracts while the node boots; deployment waits for it
+            self.compile_process = subprocess.Popen(
+                [_node_tool('npx'), 'hardhat', 'compile', '--quiet'],
+                cwd=contracts_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                text=True
+            )
+            
+            # Wait up to 60 seconds for the node to announce its RPC server,
+            # then confirm with a single probe
+            logger.info("Waiting for blockchain to start...")
+            started_at = time.monotonic()
+            announced = self._wait_for_output(log_path, HARDHAT_READY_MARKER, timeout=60)
+            remaining = max(1.0, 60 - (time.monotonic() - started_at))
+            if (announced and self._check_blockchain_running()) or self._wait_ready(required_consecutive=1, deadline=remaining):
+                logger.info("Blockchain is ready and responding!")
+                return True
             
             logger.error("Blockchain failed to start within timeout")
+            if self.node_output:
+                logger.error("Hardhat node output:\n" + "\n".join(self.node_output))
             return False
             
         except Exception as e:
@@ -170,42 +325,119 @@ class BlockchainAutoSetup:
             logger.error(traceback.format_exc())
             return False
     
+    def _wait_for_output(self, log_path, marker, timeout):
+        """Follow the node's log until a line contains marker.
+
+        Returns False if the node exits or timeout seconds pass first. Lines
+        read are kept in node_output.
+        """
+        deadline = time.monotonic() + timeout
+        partial = ''
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as log:
+            while time.monotonic() < deadline:
+                partial += log.readline()
+                if not partial.endswith('\n'):
+                    if self.blockchain_process.poll() is not None:
+                        return False
+                    time.sleep(0.05)
+                    continue
+                line, partial = partial.rstrip(), ''
+                self.node_output.append(line)
+                if marker in line:
+                    return True
+        return False
+    
+    @staticmethod
+    def _npm_dependencies_stale(contracts_dir):
+        """True if node_modules is missing or older than package-lock.json"""
+        installed_lock = contracts_dir / 'node_modules' / '.package-lock.json'
+        if not installed_lock.exists():
+            return True
+        lockfile = contracts_dir / 'package-lock.json'
+        return lockfile.exists() and installed_lock.stat().st_mtime < lockfile.stat().st_mtime
+    
+    def _wait_for_compile(self):
+        """Join the background compile started alongside the node, if any"""
+        process, self.compile_process = self.compile_process, None
+        if process is None:
+            return
+        try:
+            _, stderr = process.communicate(timeout=120)
+            if process.returncode != 0:
+                logger.warning(f"Background contract compile failed, deploy will retry it: {stderr}")
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.warning("Background contract compile timed out, deploy will retry it")
+    
+    def _run_deploy_script(self, contracts_dir, timeout):
+        """Run scripts/deploy.js, streaming its output instead of buffering it.
+
+        Error lines are logged as they arrive and the run is cut short on a
+        connection error or once errors pile up, rather than waiting out the
+        timeout. Returns True if the script exited cleanly.
+        """
+        process = subprocess.Popen(
+            [_node_tool('npx'), 'hardhat', 'run', 'scripts/deploy.js', '--network', 'localhost'],
+            cwd=contracts_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            # Own process group, so npx and the node process it spawns can be killed together
+            **({'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == 'nt' else {'start_new_session': True})
+        )
+        timed_out = threading.Event()
+        
+        def kill_on_timeout():
+            timed_out.set()
+            _kill_process_tree(process)
+        
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        errors = 0
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                if 'Error' not in line:
+                    logger.debug(line)
+                    continue
+                logger.error(line)
+                errors += 1
+                if 'HH108' in line or errors > 5:  # HH108: cannot connect to the network
+                    _kill_process_tree(process)
+                    break
+            process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+        if timed_out.is_set():
+            logger.error("Contract deployment timed out after %s seconds", timeout)
+        return process.returncode == 0
+    
     def _deploy_contracts(self):
         """Deploy smart contracts"""
         try:
             contracts_dir = Path(settings.BASE_DIR) / 'contracts'
+            self._wait_for_compile()
+            
+            # Deploying needs the node; reuse a recent probe rather than asking again
+            if not self._check_blockchain_running(max_age=10):
+                logger.error("Blockchain is not running, cannot deploy contracts")
+                return False
             
             logger.info("Deploying smart contracts...")
             
             # Add retry logic for contract deployment
             max_retries = 3
             for attempt in range(max_retries):
-                try:
-                    result = subprocess.run(
-                        ['npx', 'hardhat', 'run', 'scripts/deploy.js', '--network', 'localhost'],
-                        cwd=contracts_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=120,  # Increased timeout
-                        shell=True  # Use shell on Windows
-                    )
-                    
-                    if result.returncode == 0:
-                        logger.info("Contracts deployed successfully")
-                        logger.info(result.stdout)
-                        self.contracts_deployed = True
-                        return True
-                    else:
-                        logger.error(f"Contract deployment failed (attempt {attempt + 1}): {result.stderr}")
-                        if attempt < max_retries - 1:
-                            logger.info(f"Retrying in 5 seconds...")
-                            time.sleep(5)
-                        
-                except subprocess.TimeoutExpired:
-                    logger.error(f"Contract deployment timeout (attempt {attempt + 1})")
-                    if attempt < max_retries - 1:
-                        logger.info(f"Retrying in 5 seconds...")
-                        time.sleep(5)
+                if self._run_deploy_script(contracts_dir, timeout=120):
+                    logger.info("Contracts deployed successfully")
+                    self.contracts_deployed = True
+                    return True
+                logger.error("Contract deployment failed (attempt %d/%d)", attempt + 1, max_retries)
+                if attempt < max_retries - 1:
+                    _backoff_sleep(attempt)
             
             logger.error("All contract deployment attempts failed")
             return False
@@ -241,9 +473,8 @@ class BlockchainAutoSetup:
             deployment_file = contracts_dir / 'deployments' / 'localhost.json'
             
             if deployment_file.exists():
-                import json
-                with open(deployment_file, 'r') as f:
-                    deployment_info = json.load(f)
+                stat = deployment_file.stat()
+                deployment_info = _load_deployment(str(deployment_file), stat.st_mtime_ns, stat.st_size)
                 
                 # Update blockchain config
                 from .models import BlockchainConfig
@@ -251,7 +482,7 @@ class BlockchainAutoSetup:
                     name="Local Development Network",
                     defaults={
                         'network_type': 'local',
-                        'rpc_url': 'http://127.0.0.1:8545',
+                        'rpc_url': LOCAL_RPC_URL,
                         'chain_id': 1337,
                         'is_active': True
                     }
@@ -266,13 +497,16 @@ class BlockchainAutoSetup:
                 config.is_active = True
                 config.save()
                 
+                from .blockchain_service import invalidate_config_cache
+                invalidate_config_cache()
+                
                 logger.info(f"Django config updated with contract addresses")
                 logger.info(f"Carbon Token: {config.carbon_token_address}")
                 logger.info(f"Marketplace: {config.marketplace_address}")
                 
                 # Reload the Web3 manager to pick up the new contract addresses
-                from .blockchain import web3_manager
-                web3_manager.reload()
+                from .blockchain import get_blockchain_manager
+                get_blockchain_manager().reload()
                 logger.info("Web3 manager reloaded with new contract addresses")
                 
             else:
@@ -287,8 +521,14 @@ class BlockchainAutoSetup:
         """Stop the blockchain process"""
         if self.blockchain_process:
             try:
-                self.blockchain_process.terminate()
+                if os.name == 'nt':
+                    # The detached node has no console to receive CTRL_BREAK,
+                    # so end npx and node together with taskkill /T
+                    _kill_process_tree(self.blockchain_process)
+                elif self.blockchain_process.poll() is None:
+                    self.blockchain_process.terminate()
                 self.blockchain_process.wait(timeout=10)
+                (Path(settings.BASE_DIR) / 'contracts' / '.hardhat.pid').unlink(missing_ok=True)
                 logger.info("Blockchain process stopped")
             except Exception as e:
                 logger.error(f"Error stopping blockchain: {e}")
@@ -1,19 +1,95 @@
 """
 Blockchain service layer for carbon credit operations
 """
+import functools
 import logging
-from typing import Optional, Dict, Any
+import re
+import time
+from typing import Optional, Dict, Any, List
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from web3 import Web3
 from .models import Project, Wallet, ChainTransaction, BlockchainConfig
-from .blockchain import get_blockchain_manager, web3_manager
+from .blockchain import get_blockchain_manager
 
 logger = logging.getLogger(__name__)
 
+_ADDRESS_RE = re.compile(r'\A0x[0-9a-fA-F]{40}\Z')
 
+# Wallet addresses rarely change and the active config only changes on
+# redeploy, so both are reused for a short while instead of re-queried. Only
+# the address string is cached, never the shared model instance.
+_CACHE_TTL = 30.0
+_WALLET_CACHE_SIZE = 10_000
+_wallet_cache: Dict[int, tuple] = {}
+_config_cache: Dict[str, tuple] = {}
+
+
+def _wallet_address(user: User) -> str:
+    """Address of Wallet.ensure(user), cached per user id for _CACHE_TTL seconds"""
+    now = time.monotonic()
+    hit = _wallet_cache.get(user.id)
+    if hit and now - hit[0] < _CACHE_TTL:
+        return hit[1]
+    wallet = Wallet.ensure(user)
+    _cache_wallet_address(wallet.user_id, wallet.address, now)
+    return wallet.address
+
+
+def _cache_wallet_address(user_id: int, address: str, now: float):
+    if len(_wallet_cache) >= _WALLET_CACHE_SIZE:
+        _wallet_cache.clear()
+    _wallet_cache[user_id] = (now, address)
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def _forget_wallet(sender, instance: Wallet, **kwargs):
+    # Edited or deleted wallets (e.g. from the admin) are re-read on next use
+    _wallet_cache.pop(instance.user_id, None)
+
+
+def _active_config() -> Optional[BlockchainConfig]:
+    """BlockchainConfig.get_active_config(), cached for _CACHE_TTL seconds"""
+    now = time.monotonic()
+    hit = _config_cache.get('active')
+    if hit and now - hit[0] < _CACHE_TTL:
+        return hit[1]
+    config = BlockchainConfig.get_active_config()
+    _config_cache['active'] = (now, config)
+    return config
+
+
+def invalidate_config_cache():
+    """Forget the cached active config, e.g. after contracts are redeployed"""
+    _config_cache.clear()
+
+
+# A successful connectivity probe is trusted this long before re-probing
+_CONNECTED_TTL = 5.0
+_connection_state: Dict[str, float] = {}
+
+
+def _is_connected(manager) -> bool:
+    """manager.w3.is_connected(), reusing a success for _CONNECTED_TTL seconds"""
+    if not manager.w3:
+        return False
+    now = time.monotonic()
+    if now - _connection_state.get('ok_at', float('-inf')) < _CONNECTED_TTL:
+        return True
+    if manager.w3.is_connected():
+        _connection_state['ok_at'] = now
+        return True
+    _connection_state.clear()
+    return False
+
+
+@functools.lru_cache(maxsize=4096)
 def to_checksum(address: str) -> str:
-    """Convert address to checksum format"""
+    """Convert address to checksum format; memoized, invalid input is returned as-is"""
     try:
         return Web3.to_checksum_address(address)
     except Exception:
@@ -23,17 +99,46 @@ def to_checksum(address: str) -> str:
 class BlockchainService:
     """Service layer for blockchain operations - Real blockchain only"""
     
+    @staticmethod
+    def ensure_wallets(users: List[User]) -> Dict[int, str]:
+        """Wallet.ensure for many users at once, returning addresses keyed by user id
+
+        Uncached wallets are read in one query and any missing ones are
+        created with a single bulk insert.
+        """
+        now = time.monotonic()
+        wallets = {}
+        for user in users:
+            hit = _wallet_cache.get(user.id)
+            if hit and now - hit[0] < _CACHE_TTL:
+                wallets[user.id] = hit[1]
+        missing = {user.id for user in users} - wallets.keys()
+        if missing:
+            found = dict(Wallet.objects.filter(user_id__in=missing).values_list('user_id', 'address'))
+            new = missing - found.keys()
+            if new:
+                Wallet.objects.bulk_create(
+                    [Wallet(user_id=user_id, address=Wallet._generate_address()) for user_id in new],
+                    ignore_conflicts=True,
+                )
+                # Re-read so rows created concurrently by another request win
+                found.update(Wallet.objects.filter(user_id__in=new).values_list('user_id', 'address'))
+            for user_id, address in found.items():
+                _cache_wallet_address(user_id, address, now)
+            wallets.update(found)
+        return wallets
+    
     @staticmethod
     def register_project_on_blockchain(project: Project) -> Optional[str]:
         """Register a project on the blockchain and return transaction hash"""
         try:
             # Ensure NGO has a wallet
-            ngo_wallet = Wallet.ensure(project.ngo)
+            ngo_address = _wallet_address(project.ngo)
             
             # Get blockchain manager - must be real blockchain
-            manager = web3_manager
+            manager = get_blockchain_manager()
             
-            if not manager.w3 or not manager.w3.is_connected():
+            if not _is_connected(manager):
                 raise Exception("Blockchain not connected. Please ensure local blockchain is running.")
             
             if not hasattr(manager, 'register_project_on_chain'):
@@ -42,7 +147,7 @@ class BlockchainService:
             # Use real blockchain only - convert to checksum address
             tx_hash = manager.register_project_on_chain(
                 project_name=project.title,
-                ngo_address=to_checksum(ngo_wallet.address),
+                ngo_address=to_checksum(ngo_address),
                 estimated_credits=project.credits or 0
             )
             
@@ -53,6 +158,7 @@ class BlockchainService:
                 raise Exception(f"Failed to register project {project.id} on blockchain")
                 
         except Exception as e:
+            _connection_state.clear()
             logger.error(f"Error registering project {project.id} on blockchain: {e}")
             raise e
     
@@ -69,13 +175,12 @@ class BlockchainService:
                 return None
             
             # Ensure NGO has a wallet
-            ngo_wallet = Wallet.ensure(project.ngo)
-            ngo_address = to_checksum(ngo_wallet.address)
+            ngo_address = to_checksum(_wallet_address(project.ngo))
             
             # Get blockchain manager - must be real blockchain
-            manager = web3_manager
+            manager = get_blockchain_manager()
             
-            if not manager.w3 or not manager.w3.is_connected():
+            if not _is_connected(manager):
                 raise Exception("Blockchain not connected. Please start local blockchain: npx hardhat node")
             
             if not manager.carbon_token_contract:
@@ -134,6 +239,7 @@ class BlockchainService:
                 raise Exception(f"Failed to mint credits for project {project.id}")
                 
         except Exception as e:
+            _connection_state.clear()
             logger.error(f"Error minting credits for project {project.id}: {e}")
             raise e
     
@@ -142,17 +248,16 @@ class BlockchainService:
         """Transfer credits between users - Real blockchain only"""
         try:
             # Ensure both users have wallets
-            from_wallet = Wallet.ensure(from_user)
-            to_wallet = Wallet.ensure(to_user)
+            addresses = BlockchainService.ensure_wallets([from_user, to_user])
             
             # Convert to checksum addresses
-            from_address = to_checksum(from_wallet.address)
-            to_address = to_checksum(to_wallet.address)
+            from_address = to_checksum(addresses[from_user.id])
+            to_address = to_checksum(addresses[to_user.id])
             
             # Get blockchain manager - must be real blockchain
-            manager = web3_manager
+            manager = get_blockchain_manager()
             
-            if not manager.w3 or not manager.w3.is_connected():
+            if not _is_connected(manager):
                 raise Exception("Blockchain not connected. Please start local blockchain: npx hardhat node")
             
             if not manager.carbon_token_contract:
@@ -204,43 +309,77 @@ class BlockchainService:
                 raise Exception(f"Failed to transfer credits from {from_user.username} to {to_user.username}")
                 
         except Exception as e:
+            _connection_state.clear()
             logger.error(f"Error transferring credits: {e}")
             raise e
     
+    @staticmethod
+    async def mint_credits_for_project_async(project: Project) -> Optional[str]:
+        """mint_credits_for_project for async views, run off the event loop"""
+        return await sync_to_async(BlockchainService.mint_credits_for_project, thread_sensitive=False)(project)
+    
+    @staticmethod
+    async def transfer_credits_async(from_user: User, to_user: User, amount: int, project_id: int) -> Optional[str]:
+        """transfer_credits for async views, run off the event loop"""
+        return await sync_to_async(BlockchainService.transfer_credits, thread_sensitive=False)(
+            from_user, to_user, amount, project_id
+        )
+    
     @staticmethod
     def get_user_balance(user: User) -> int:
         """Get user's total token balance"""
         try:
-            wallet = Wallet.ensure(user)
+            address = _wallet_address(user)
             manager = get_blockchain_manager()
             
             if hasattr(manager, 'get_balance'):
-                return manager.get_balance(wallet.address)
+                return manager.get_balance(address)
             else:
-                # Fallback: calculate from transactions
-                received = ChainTransaction.objects.filter(
-                    recipient=wallet.address,
-                    kind__in=['MINT', 'TRANSFER']
-                ).aggregate(total=models.Sum('amount'))['total'] or 0
-                
-                sent = ChainTransaction.objects.filter(
-                    sender=wallet.address,
-                    kind='TRANSFER'
-                ).aggregate(total=models.Sum('amount'))['total'] or 0
-                
-                return max(0, received - sent)
+                # Fallback: calculate from transactions in one round-trip
+                received = models.Q(recipient=address, kind__in=['MINT', 'TRANSFER'])
+                sent = models.Q(sender=address, kind='TRANSFER')
+                totals = ChainTransaction.objects.filter(received | sent).aggregate(
+                    received=models.Sum('amount', filter=received),
+                    sent=models.Sum('amount', filter=sent),
+                )
+                return max(0, (totals['received'] or 0) - (totals['sent'] or 0))
                 
         except Exception as e:
             logger.error(f"Error getting balance for user {user.username}: {e}")
             return 0
     
+    @staticmethod
+    def get_user_balances(users: List[User]) -> Dict[int, int]:
+        """Get token balances for many users at once, keyed by user id"""
+        try:
+            addresses = dict(Wallet.objects.filter(user__in=users).values_list('user_id', 'address'))
+            manager = get_blockchain_manager()
+            
+            if hasattr(manager, 'get_balances'):
+                balances = manager.get_balances(list(addresses.values()))
+            else:
+                # Fallback: one grouped query per ledger side
+                received = ChainTransaction.objects.filter(
+                    recipient__in=addresses.values(), kind__in=['MINT', 'TRANSFER']
+                ).values_list('recipient').annotate(total=models.Sum('amount'))
+                sent = dict(ChainTransaction.objects.filter(
+                    sender__in=addresses.values(), kind='TRANSFER'
+                ).values_list('sender').annotate(total=models.Sum('amount')))
+                balances = {address: max(0, total - sent.get(address, 0)) for address, total in received}
+            
+            return {user.id: balances.get(addresses.get(user.id), 0) for user in users}
+                
+        except Exception as e:
+            logger.error(f"Error getting balances for {len(users)} users: {e}")
+            return {user.id: 0 for user in users}
+    
     @staticmethod
     def create_tender_on_blockchain(title: str, description: str, credits_required: int, 
                                    max_price: int, duration_days: int, corporate_user: User) -> Optional[str]:
         """Create a tender on the blockchain marketplace"""
         try:
             # Ensure corporate user has a wallet
-            corporate_wallet = Wallet.ensure(corporate_user)
+            _wallet_address(corporate_user)
             
             # Get blockchain manager
             manager = get_blockchain_manager()
@@ -274,7 +413,7 @@ class BlockchainService:
     def get_blockchain_status() -> Dict[str, Any]:
         """Get current blockchain connection status"""
         try:
-            config = BlockchainConfig.get_active_config()
+            config = _active_config()
             
             if not config:
                 return {
@@ -315,13 +454,6 @@ class BlockchainService:
     @staticmethod
     def validate_address(address: str) -> bool:
         """Validate if an address is a valid Ethereum address"""
-        try:
-            if not address or len(address) != 42 or not address.startswith('0x'):
-                return False
-            
-            # Try to convert to checksum address
-            from web3 import Web3
-            Web3.to_checksum_address(address)
-            return True
-        except Exception:
-            return False
\ No newline at end of file
+        # Any 0x-prefixed 40-digit hex string checksums successfully, so the
+        # pattern alone decides without hashing the address
+        return isinstance(address, str) and _ADDRESS_RE.match(address) is not None
\ No newline at end of file
@@ -1,14 +1,25 @@
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template, render_to_string
 from datetime import datetime
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.core.files.storage import default_storage
-from django.conf import settings
-from .models import Purchase
+from django.db import close_old_connections, transaction
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+import functools
+import hashlib
+import json
+import logging
 import os
-import re
+import tempfile
+
+if TYPE_CHECKING:
+    from .models import Purchase
+
+
+logger = logging.getLogger(__name__)
 
 
 DEFAULT_FROM = getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@example.org')
@@ -19,13 +30,68 @@ SENDER_TITLE = getattr(settings, 'SENDER_TITLE', 'Support Team')
 SENDER_NAME = getattr(settings, 'SENDER_NAME', ORG_NAME)
 DASHBOARD_URL = getattr(settings, 'DASHBOARD_URL', 'http://127.0.0.1:8080/')
 
+# SMTP delivery runs here so requests never wait on the mail server
+_MAIL_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='mail')
+# Certificate rendering is CPU-heavy; keep it off the request path too
+_CERT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='certificate')
+
+
+# Plain-text part used when a template has no .txt companion
+FALLBACK_TEXT = f"This message from {ORG_NAME} is best viewed in an HTML-capable email client."
+
+
+@functools.lru_cache(maxsize=32)
+def _text_template(template_name: str):
+    """The .txt companion of an .html email template, or None if there is none"""
+    if not template_name.endswith('.html'):
+        return None
+    try:
+        return get_template(template_name[:-len('.html')] + '.txt')
+    except TemplateDoesNotExist:
+        return None
+
+
+def _render_text(template_name: str, context: dict) -> str:
+    text_template = _text_template(template_name)
+    return text_template.render(context) if text_template else FALLBACK_TEXT
+
+
+def _deliver(msg: EmailMultiAlternatives):
+    try:
+        msg.send(fail_silently=True)
+    except Exception:
+        logger.exception("Failed sending email %r to %s", msg.subject, msg.to)
+
 
 def send_templated_email(subject: str, template_name: str, context: dict, to: list[str]):
+    """Render the email now and hand delivery to the mail pool.
+
+    The plain-text part comes from a sibling ``.txt`` template when one
+    exists, otherwise a short static notice (no HTML stripping per send).
+
+    Rendering stays on the caller's thread because contexts carry model
+    instances; the message is queued once the surrounding transaction commits.
+    """
     html = render_to_string(template_name, context)
-    text = strip_tags(html)
+    text = _render_text(template_name, context)
     msg = EmailMultiAlternatives(subject, text, DEFAULT_FROM, to)
     msg.attach_alternative(html, "text/html")
-    msg.send(fail_silently=True)
+    transaction.on_commit(lambda: _MAIL_POOL.submit(_deliver, msg))
+
+
+# Separators in an email local-part that become spaces in a display name
+_NAME_SEPARATORS = str.maketrans('._-', '   ')
+
+
+def format_display_name(value: str) -> str:
+    if not value:
+        return ''
+    # If it's an email, turn the local-part's dots/underscores/hyphens into single spaces
+    if '@' in value:
+        local = value.partition('@')[0]
+        return ' '.join(local.translate(_NAME_SEPARATORS).split()).title()
+    # Otherwise title-case the name
+    return ' '.join([p.capitalize() for p in value.split()])
 
 
 def format_date(dt: datetime | None) -> str:
@@ -34,9 +100,183 @@ def format_date(dt: datetime | None) -> str:
     return dt.strftime('%d %B %Y')
 
 
-def render_certificate_pdf(purchase: Purchase) -> str | None:
+# PDF backends are optional and some are slow to import (WeasyPrint loads
+# Pango/Cairo); each getter imports once per process and remembers a missing
+# backend as None instead of retrying the import for every certificate
+@functools.lru_cache(maxsize=1)
+def _get_weasyprint_html():
+    try:
+        from weasyprint import HTML
+        return HTML
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_weasyprint_fonts():
+    """One FontConfiguration shared by every render, so the system font map is scanned once"""
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except Exception:
+        try:
+            from weasyprint.fonts import FontConfiguration  # WeasyPrint < 53
+        except Exception:
+            return None
+    return FontConfiguration()
+
+
+def _weasyprint_write(document, target):
+    """write_pdf without the font subsetting pass; the certificate embeds one or two fonts"""
+    font_config = _get_weasyprint_fonts()
+    try:
+        # WeasyPrint >= 59
+        document.write_pdf(target=target, font_config=font_config, full_fonts=True)
+    except TypeError:
+        _rewind(target)
+        document.write_pdf(target=target, font_config=font_config, optimize_size=())
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pisa():
+    try:
+        from xhtml2pdf import pisa
+        return pisa
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_reportlab():
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.units import mm
+        return A4, canvas, mm
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=4)
+def _cert_image(name: str):
+    """Decoded certificate artwork from api/static/api/images, or None if absent"""
+    path = os.path.join(getattr(settings, 'BASE_DIR', ''), 'api', 'static', 'api', 'images', name)
+    if not os.path.exists(path):
+        return None
+    try:
+        from reportlab.lib.utils import ImageReader
+        return ImageReader(path)
+    except Exception:
+        return None
+
+
+def _rewind(target):
+    target.seek(0)
+    target.truncate()
+
+
+def _render_certificate_html(ctx: dict, target) -> bool:
+    """Render the HTML certificate template into target with WeasyPrint, or xhtml2pdf as a fallback"""
+    HTML = _get_weasyprint_html()
+    pisa = _get_pisa()
+    if HTML is None and pisa is None:
+        return False
+    html = render_to_string('api/certificates/purchase_certificate.html', ctx)
+    if HTML is not None:
+        try:
+            _weasyprint_write(HTML(string=html, base_url=getattr(settings, 'BASE_DIR', None)), target)
+            return target.tell() > 0
+        except Exception:
+            _rewind(target)
+    if pisa is None:
+        return False
+    try:
+        status = pisa.CreatePDF(html, dest=target)
+        return not status.err and target.tell() > 0
+    except Exception:
+        return False
+
+
+def _render_certificate_reportlab(ctx: dict, target) -> bool:
+    """Draw the certificate into target directly with ReportLab (no HTML/CSS layout pass)"""
+    reportlab = _get_reportlab()
+    if reportlab is None:
+        return False
+    A4, canvas, mm = reportlab
+    try:
+        c = canvas.Canvas(target, pagesize=A4)
+        width, height = A4
+
+        # Decorative frame and seal from static files, if present (decoded once per process)
+        frame = _cert_image('certificate_frame.png')
+        seal = _cert_image('certificate_seal.png')
+        try:
+            if frame:
+                c.drawImage(frame, 0, 0, width=width, height=height)
+        except Exception:
+            pass
+
+        # Title
+        c.setFont("Times-Bold", 36)
+        c.drawCentredString(width / 2.0, height - 45 * mm, "Carbon Credit Certificate")
+
+        # Main block
+        text_y = height - 70 * mm
+        c.setFont("Times-Roman", 14)
+        c.drawCentredString(width / 2.0, text_y, f"This certificate confirms that")
+        text_y -= 8 * mm
+        c.setFont("Times-Bold", 18)
+        c.drawCentredString(width / 2.0, text_y, f"{ctx['credits']} carbon credits")
+        text_y -= 9 * mm
+        c.setFont("Times-Roman", 12)
+        c.drawCentredString(width / 2.0, text_y, f"equivalent to {ctx['co2e']} metric tonnes of CO2e")
+        text_y -= 12 * mm
+        c.setFont("Times-Bold", 16)
+        c.drawCentredString(width / 2.0, text_y, ctx['company_name'])
+
+        # From / NGO
+        text_y -= 24 * mm
+        c.setFont("Times-Roman", 12)
+        c.drawString(40 * mm, text_y, "From")
+        c.setFont("Times-Bold", 14)
+        c.drawCentredString(width / 2.0, text_y, ctx['ngo_name'])
+
+        # On behalf
+        text_y -= 12 * mm
+        c.setFont("Times-Italic", 14)
+        c.drawCentredString(width / 2.0, text_y, ctx['beneficiary_name'])
+
+        # Seal if available
+        try:
+            if seal:
+                seal_w = 24 * mm
+                seal_h = 24 * mm
+                c.drawImage(seal, (width - seal_w) / 2.0, 45 * mm, width=seal_w, height=seal_h, mask='auto')
+        except Exception:
+            pass
+
+        # Footer
+        c.setFont("Times-Roman", 10)
+        c.drawCentredString(width / 2.0, 30 * mm, f"Purchased through {ORG_NAME}")
+        c.drawCentredString(width / 2.0, 25 * mm, f"Date of Issue: {ctx['issue_date']}")
+        c.drawCentredString(width / 2.0, 20 * mm, f"Certificate ID: {ctx['certificate_id']}")
+
+        c.showPage()
+        c.save()
+        return True
+    except Exception as e:
+        logger.exception("ReportLab certificate rendering failed: %s", e)
+        return False
+
+
+def render_certificate_pdf(purchase: 'Purchase') -> str | None:
     """Render a PDF certificate for a purchase and store it.
 
+    The single-page layout is drawn with ReportLab; the HTML template
+    (WeasyPrint/xhtml2pdf) is used first only when settings.CERT_USE_HTML is
+    set, and otherwise only if ReportLab is unavailable. Files are named by a
+    digest of their content inputs, so re-requesting an unchanged certificate
+    reuses the stored PDF instead of rendering it again.
+
     Returns the storage path (relative) or None on failure.
     """
     try:
@@ -47,18 +287,6 @@ def render_certificate_pdf(purchase: Purchase) -> str | None:
         # Simple CO2e estimate: assume 1 credit = 1 tCO2e unless you have a model
         co2e = float(purchase.credits)
 
-        def format_display_name(value: str) -> str:
-            if not value:
-                return ''
-            # If it's an email, extract the local-part and turn separators into spaces
-            if '@' in value:
-                local = value.split('@', 1)[0]
-                # replace dots/underscores/hyphens with spaces
-                cleaned = re.sub(r'[._-]+', ' ', local)
-                return cleaned.replace('.', ' ').strip().title()
-            # Otherwise title-case the name
-            return ' '.join([p.capitalize() for p in value.split()])
-
         ctx = {
             'credits': purchase.credits,
             'co2e': f"{co2e:.0f}",
@@ -70,110 +298,93 @@ def render_certificate_pdf(purchase: Purchase) -> str | None:
             'seal_url': getattr(settings, 'CERT_SEAL_URL', ''),
         }
 
-        html = render_to_string('api/certificates/purchase_certificate.html', ctx)
+        use_html = getattr(settings, 'CERT_USE_HTML', False)
+        digest = hashlib.sha256(
+            json.dumps([ctx, ORG_NAME, use_html], sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        filename = f"certificates/purchase_{purchase.id}_{digest}.pdf"
+        from .models import Purchase
+        if default_storage.exists(filename):
+            Purchase.objects.filter(pk=purchase.pk).update(certificate=filename)
+            return filename
 
-        pdf_bytes = None
-        # Try WeasyPrint first
-        try:
-            from weasyprint import HTML
-            pdf_bytes = HTML(string=html, base_url=getattr(settings, 'BASE_DIR', None)).write_pdf()
-        except Exception:
-            # Fallback to xhtml2pdf
-            try:
-                from xhtml2pdf import pisa
-                from io import BytesIO
-                out = BytesIO()
-                pisa.CreatePDF(html, dest=out)
-                pdf_bytes = out.getvalue()
-            except Exception:
-                pdf_bytes = None
-
-        # Final fallback: generate a simple PDF using ReportLab (pure-Python)
-        if not pdf_bytes:
-            try:
-                from reportlab.lib.pagesizes import A4
-                from reportlab.pdfgen import canvas
-                from reportlab.lib.units import mm
-                from io import BytesIO
-                buf = BytesIO()
-                c = canvas.Canvas(buf, pagesize=A4)
-                width, height = A4
-
-                # Attempt to load a decorative frame and seal from static files if present.
-                frame_path = os.path.join(getattr(settings, 'BASE_DIR', ''), 'api', 'static', 'api', 'images', 'certificate_frame.png')
-                seal_path = os.path.join(getattr(settings, 'BASE_DIR', ''), 'api', 'static', 'api', 'images', 'certificate_seal.png')
-                try:
-                    if os.path.exists(frame_path):
-                        c.drawImage(frame_path, 0, 0, width=width, height=height)
-                except Exception:
-                    pass
-
-                # Title
-                c.setFont("Times-Bold", 36)
-                c.drawCentredString(width / 2.0, height - 45 * mm, "Carbon Credit Certificate")
-
-                # Main block
-                c.setFont("Times-Roman", 12)
-                text_y = height - 70 * mm
-                c.setFont("Times-Roman", 14)
-                c.drawCentredString(width / 2.0, text_y, f"This certificate confirms that")
-                text_y -= 8 * mm
-                c.setFont("Times-Bold", 18)
-                c.drawCentredString(width / 2.0, text_y, f"{ctx['credits']} carbon credits")
-                text_y -= 9 * mm
-                c.setFont("Times-Roman", 12)
-                c.drawCentredString(width / 2.0, text_y, f"equivalent to {ctx['co2e']} metric tonnes of CO2e")
-                text_y -= 12 * mm
-                c.setFont("Times-Bold", 16)
-                c.drawCentredString(width / 2.0, text_y, ctx['company_name'])
-
-                # From / NGO
-                text_y -= 24 * mm
-                c.setFont("Times-Roman", 12)
-                c.drawString(40 * mm, text_y, "From")
-                c.setFont("Times-Bold", 14)
-                c.drawCentredString(width / 2.0, text_y, ctx['ngo_name'])
-
-                # On behalf
-                text_y -= 12 * mm
-                c.setFont("Times-Italic", 14)
-                c.drawCentredString(width / 2.0, text_y, ctx['beneficiary_name'])
-
-                # Seal if available
-                try:
-                    if os.path.exists(seal_path):
-                        seal_w = 24 * mm
-                        seal_h = 24 * mm
-                        c.drawImage(seal_path, (width - seal_w) / 2.0, 45 * mm, width=seal_w, height=seal_h, mask='auto')
-                except Exception:
-                    pass
-
-                # Footer
-                c.setFont("Times-Roman", 10)
-                c.drawCentredString(width / 2.0, 30 * mm, f"Purchased through {ORG_NAME}")
-                c.drawCentredString(width / 2.0, 25 * mm, f"Date of Issue: {ctx['issue_date']}")
-                c.drawCentredString(width / 2.0, 20 * mm, f"Certificate ID: {ctx['certificate_id']}")
-
-                c.showPage()
-                c.save()
-                buf.seek(0)
-                pdf_bytes = buf.getvalue()
-            except Exception as e:
-                # If even ReportLab isn't available or fails, log for debugging and return None
-                try:
-                    import logging
-                    logging.exception("ReportLab fallback failed: %s", e)
-                except Exception:
-                    print("ReportLab fallback failed:", e)
-                pdf_bytes = None
-
-        if not pdf_bytes:
-            return None
-
-        filename = f"certificates/purchase_{purchase.id}.pdf"
-        default_storage.save(filename, ContentFile(pdf_bytes))
+        if use_html:
+            renderers = (_render_certificate_html, _render_certificate_reportlab)
+        else:
+            renderers = (_render_certificate_reportlab, _render_certificate_html)
+        # Renderers write straight into a spooled file that storage then reads in
+        # chunks, so no full copy of the PDF is made (it only hits disk if large)
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as out:
+            for renderer in renderers:
+                _rewind(out)
+                if renderer(ctx, out):
+                    break
+            else:
+                return None
+            out.seek(0)
+            filename = default_storage.save(filename, File(out))
         # Update model (do not recurse signals; save minimal fields)
         Purchase.objects.filter(pk=purchase.pk).update(certificate=filename)
         return filename
     except Exception:
         return None
+
+
+def _email_certificate(purchase: 'Purchase', cert_path: str):
+    ngo = purchase.project.ngo
+    corporate = purchase.corporate
+    ctx = {
+        'ngo_name': ngo.get_full_name() or ngo.username,
+        'company_name': corporate.get_full_name() or corporate.username,
+        'credits': purchase.credits,
+        'transaction_id': purchase.id,
+        'purchase_date': purchase.timestamp,
+        'dashboard_link': DASHBOARD_URL,
+        'org_name': ORG_NAME,
+    }
+    subject = f"Your Certificate for Purchase #{purchase.id}"
+    template_name = 'api/emails/corporate_purchase_confirmation.html'
+    html = render_to_string(template_name, ctx)
+    text = _render_text(template_name, ctx)
+    buyer_email = corporate.email or corporate.username
+    msg = EmailMultiAlternatives(subject, text, DEFAULT_FROM, [buyer_email])
+    msg.attach_alternative(html, 'text/html')
+    with default_storage.open(cert_path, 'rb') as f:
+        msg.attach(f'certificate_{purchase.id}.pdf', f.read(), 'application/pdf')
+    if not msg.send(fail_silently=False):
+        logger.error('Email sent returned 0 for purchase %s to %s', purchase.id, buyer_email)
+
+
+def generate_and_email_certificate(purchase_id: int) -> str | None:
+    """Render the certificate for a purchase and email it to the buyer.
+
+    Runs on the certificate pool; returns the stored path or None on failure.
+    The outcome is recorded on Purchase.certificate_status for the dashboard.
+    """
+    from .models import Purchase
+    status = "failed"
+    try:
+        purchase = Purchase.objects.select_related('project__ngo', 'corporate').get(pk=purchase_id)
+        cert_path = render_certificate_pdf(purchase)
+        if not cert_path:
+            logger.error("Certificate generation failed for purchase %s", purchase_id)
+            return None
+        # The PDF is downloadable from here on, even if the email below fails
+        status = "ready"
+        _email_certificate(purchase, cert_path)
+        return cert_path
+    except Exception:
+        logger.exception("Failed generating/sending certificate for purchase %s", purchase_id)
+        return None
+    finally:
+        try:
+            Purchase.objects.filter(pk=purchase_id).update(certificate_status=status)
+        except Exception:
+            logger.exception("Failed recording certificate status for purchase %s", purchase_id)
+        close_old_connections()
+
+
+def queue_certificate(purchase: 'Purchase'):
+    """Generate and email a purchase certificate in the background"""
+    purchase_id = purchase.pk
+    transaction.on_commit(lambda: _CERT_POOL.submit(generate_and_email_certificate, purchase_id))
@@ -1,7 +1,58 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 from django import forms
+from django.db import IntegrityError, transaction
 from django.contrib.auth.models import User
 from .models import Project, Wallet, NGOLogin, CorporateLogin, Tender, TenderApplication, TenderV2, ProposalV2
 
+# Cheap format checks run before any database or session lookup
+_WALLET_RE = re.compile(r'^0x[0-9a-fA-F]{40}$')
+_PHONE_RE = re.compile(r'^\+?\d[\d\s\-]{6,20}$')
+
+# Public email providers that corporate registrations may not use
+_BLOCKED_EMAIL_DOMAINS = frozenset({
+    "gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "live.com", "aol.com",
+    "icloud.com", "proton.me", "protonmail.com", "yandex.com", "rediffmail.com", "zoho.com",
+})
+
+# Optional uploads stored under documents/identity/<email>/ on NGO registration
+_NGO_DOCUMENT_FIELDS = (
+    "aadhaar_pan_document",
+    "gst_registration_certificate",
+    "government_id_document",
+    "land_ownership_proof",
+    "environmental_clearance_certificate",
+)
+
+# Optional corporate uploads and the filename tag each is saved under
+_CORPORATE_DOCUMENT_FIELDS = (
+    ("gst_document", "gst"),
+    ("certificate_of_incorporation", "coi"),
+    ("board_resolution", "br"),
+    ("csr_mandate", "csr"),
+)
+
+# Session flags set by the OTP views, read together once per clean()
+_OTP_SESSION_KEYS = ("otp_email_verified", "otp_verified_email_value", "otp_phone_verified", "otp_verified_phone_value")
+
+
+def _otp_state(session):
+    """Snapshot of the OTP verification flags held in a session"""
+    return {key: session.get(key) for key in _OTP_SESSION_KEYS}
+
+
+# Registration uploads are written concurrently so remote storage round-trips overlap
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=5, thread_name_prefix='upload')
+
+
+def _save_uploads(uploads):
+    """Save (name, file) pairs to default storage; returns the stored names in order"""
+    from django.core.files.storage import default_storage
+    if len(uploads) <= 1:
+        return [default_storage.save(name, f) for name, f in uploads]
+    return list(_UPLOAD_POOL.map(lambda item: default_storage.save(*item), uploads))
+
 class ProjectForm(forms.ModelForm):
     class Meta:
         model = Project
@@ -100,87 +151,94 @@ class NGORegisterForm(forms.ModelForm):
         self.generated_password = None
 
     def save(self, commit=True):
+        cd = self.cleaned_data
         user = super().save(commit=False)
         # Use email as username so the legacy provisioning/auth code can
         # find users by email (username field is used elsewhere).
-        user.username = self.cleaned_data.get("email") or self.cleaned_data.get("username")
+        user.username = cd.get("email") or cd.get("username")
         # Set provided password
-        pwd = self.cleaned_data.get("password")
+        pwd = cd.get("password")
         user.set_password(pwd)
         # store organization name in first_name for now
-        name = self.cleaned_data.get("name")
+        name = cd.get("name")
         if name:
             user.first_name = name
         if commit:
-            user.save()
-            # ensure wallet address uniqueness
-            from django.core.exceptions import ValidationError
-            addr = self.cleaned_data.get("wallet_address")
-            if addr and Wallet.objects.filter(address=addr).exists():
-                raise ValidationError({"wallet_address": ["This wallet address is already in use."]})
-            Wallet.objects.create(user=user, address=addr)
-            # Save identity documents if provided (paths not persisted to DB for now)
-            try:
-                from django.core.files.storage import default_storage
-                from django.utils.text import slugify
-                import os
-                base_dir = f"documents/identity/{slugify(user.email)}/"
-                os.makedirs(os.path.join(getattr(__import__('django.conf').conf, 'settings').MEDIA_ROOT, base_dir), exist_ok=True)
-                def _save_if_present(field_name):
-                    f = self.files.get(field_name) if hasattr(self, 'files') else None
-                    if f:
-                        filename = f"{field_name}_{f.name}"
-                        path = default_storage.save(base_dir + filename, f)
-                        return path
-                    return None
-                _save_if_present("aadhaar_pan_document")
-                _save_if_present("gst_registration_certificate")
-                _save_if_present("government_id_document")
-                _save_if_present("land_ownership_proof")
-                _save_if_present("environmental_clearance_certificate")
-
-                # Save bank details as a JSON file under the same folder (lightweight storage)
-                bank = {
-                    "account_name": self.cleaned_data.get("bank_account_name"),
-                    "account_number": self.cleaned_data.get("bank_account_number"),
-                    "ifsc": self.cleaned_data.get("bank_ifsc"),
-                }
+            # User, wallet and legacy login rows commit together or not at all
+            with transaction.atomic():
+                user.save()
+                # clean_wallet_address reports duplicates; the unique index settles races
+                from django.core.exceptions import ValidationError
+                addr = cd.get("wallet_address")
                 try:
-                    import json
-                    from django.core.files.base import ContentFile
-                    bank_json = json.dumps(bank or {}, ensure_ascii=False, indent=2)
-                    default_storage.save(base_dir + "bank_details.json", ContentFile(bank_json.encode("utf-8")))
-                except Exception:
-                    pass
-            except Exception:
-                # Non-fatal; continue without failing registration
-                pass
-            # Create legacy NGOLogin record to support existing provision/login flows
-            # Attempt to persist extended NGO info into legacy NGOLogin if model supports extra fields.
-            try:
-                ngo_kwargs = {
-                    "email": user.email,
-                    # store password in legacy table for back-compat
-                    "password": pwd,
-                }
-                # Add optional fields if present
-                extra_fields = ["name", "pincode", "address", "taluka", "district", "state", "contact_person_name", "contact_number", "wallet_address"]
-                for f in extra_fields:
-                    if f in self.cleaned_data:
-                        ngo_kwargs[f] = self.cleaned_data.get(f)
-                NGOLogin.objects.create(**ngo_kwargs)
-            except TypeError:
-                # legacy model doesn't accept new kwargs, fall back to minimal record
+                    with transaction.atomic():
+                        Wallet.objects.create(user=user, address=addr)
+                except IntegrityError:
+                    raise ValidationError({"wallet_address": ["This wallet address is already in use."]})
+                # Create legacy NGOLogin record to support existing provision/login flows
+                # Attempt to persist extended NGO info into legacy NGOLogin if model supports extra fields.
                 try:
-                    NGOLogin.objects.create(email=user.email, password=pwd)
+                    ngo_kwargs = {
+                        "email": user.email,
+                        # store password in legacy table for back-compat
+                        "password": pwd,
+                    }
+                    # Add optional fields if present
+                    extra_fields = ["name", "pincode", "address", "taluka", "district", "state", "contact_person_name", "contact_number", "wallet_address"]
+                    for f in extra_fields:
+                        if f in cd:
+                            ngo_kwargs[f] = cd.get(f)
+                    with transaction.atomic():
+                        NGOLogin.objects.create(**ngo_kwargs)
+                except TypeError:
+                    # legacy model doesn't accept new kwargs, fall back to minimal record
+                    try:
+                        with transaction.atomic():
+                            NGOLogin.objects.create(email=user.email, password=pwd)
+                    except Exception:
+                        pass
                 except Exception:
+                    # ignore other creation errors
                     pass
+                # Storage writes wait for the commit so the transaction is not
+                # held open across them and a rollback leaves no stray files
+                transaction.on_commit(lambda: self._save_documents(user))
+        return user
+
+    def _save_documents(self, user):
+        # Save identity documents if provided (paths not persisted to DB for now)
+        try:
+            from django.core.files.storage import default_storage
+            from django.utils.text import slugify
+            base_dir = f"documents/identity/{slugify(user.email)}/"
+            files = self.files or {}
+            cd = self.cleaned_data
+            _save_uploads([
+                (f"{base_dir}{field_name}_{files[field_name].name}", files[field_name])
+                for field_name in _NGO_DOCUMENT_FIELDS if files.get(field_name)
+            ])
+
+            # Save bank details as a JSON file under the same folder (lightweight storage)
+            bank = {
+                "account_name": cd.get("bank_account_name"),
+                "account_number": cd.get("bank_account_number"),
+                "ifsc": cd.get("bank_ifsc"),
+            }
+            try:
+                import json
+                from django.core.files.base import ContentFile
+                bank_json = json.dumps(bank or {}, ensure_ascii=False, indent=2)
+                default_storage.save(base_dir + "bank_details.json", ContentFile(bank_json.encode("utf-8")))
             except Exception:
-                # ignore other creation errors
                 pass
-        return user
+        except Exception:
+            # Non-fatal; continue without failing registration
+            pass
+
     def clean_wallet_address(self):
         addr = self.cleaned_data.get("wallet_address")
+        if addr and not _WALLET_RE.match(addr):
+            raise forms.ValidationError("Invalid wallet address format.")
         if addr and Wallet.objects.filter(address=addr).exists():
             raise forms.ValidationError("This wallet address is already registered.")
         return addr
@@ -211,8 +269,10 @@ class NGORegisterForm(forms.ModelForm):
             self.add_error(None, "Session is required for OTP verification. Enable cookies and try again.")
             return cleaned
 
+        otp = _otp_state(session)
+
         # Email OTP must be verified
-        verified_email = session.get("otp_email_verified") and session.get("otp_verified_email_value") == email
+        verified_email = otp["otp_email_verified"] and otp["otp_verified_email_value"] == email
         if not verified_email:
             self.add_error("email", "Please verify your email via OTP before submitting.")
 
@@ -220,8 +280,10 @@ class NGORegisterForm(forms.ModelForm):
         phone = cleaned.get("contact_number")
         if not phone:
             self.add_error("contact_number", "Contact number is required for OTP verification.")
+        elif not _PHONE_RE.match(phone):
+            self.add_error("contact_number", "Enter a valid phone number.")
         else:
-            verified_phone = session.get("otp_phone_verified") and session.get("otp_verified_phone_value") == phone
+            verified_phone = otp["otp_phone_verified"] and otp["otp_verified_phone_value"] == phone
             if not verified_phone:
                 self.add_error("contact_number", "Please verify your phone via OTP before submitting.")
 
@@ -274,80 +336,80 @@ class CorporateRegisterForm(forms.ModelForm):
         self.request = request
 
     def save(self, commit=True):
+        cd = self.cleaned_data
         user = super().save(commit=False)
-        user.username = self.cleaned_data.get("email") or self.cleaned_data.get("username")
-        user.set_password(self.cleaned_data["password"])
+        user.username = cd.get("email") or cd.get("username")
+        user.set_password(cd["password"])
         # store company name in first_name for now
-        cname = self.cleaned_data.get("company_name")
+        cname = cd.get("company_name")
         if cname:
             user.first_name = cname
         # store gst number in last_name (lightweight storage)
-        gst = self.cleaned_data.get("gst_number")
+        gst = cd.get("gst_number")
         if gst:
             user.last_name = gst
         if commit:
-            user.save()
-            addr = self.cleaned_data.get("wallet_address")
-            if addr and Wallet.objects.filter(address=addr).exists():
-                raise forms.ValidationError({"wallet_address": ["This wallet address is already in use."]})
-            Wallet.objects.create(user=user, address=addr)
-            # Attempt to persist extended corporate info into legacy CorporateLogin if supported.
+            # Save corporate documents to MEDIA before the transaction opens, so
+            # it is not held across storage writes; their paths go on the legacy row
+            files = self.files or {}
+            present = [(field_name, tag) for field_name, tag in _CORPORATE_DOCUMENT_FIELDS if files.get(field_name)]
             try:
-                corp_kwargs = {"email": user.email, "password": self.cleaned_data["password"]}
-                extra_fields = [
-                    "company_name",
-                    "cin",
-                    "gst_number",
-                    "company_pan",
-                    "pincode",
-                    "address",
-                    "taluka",
-                    "district",
-                    "state",
-                    "contact_person_name",
-                    "contact_number",
-                    "wallet_address",
-                ]
-                for f in extra_fields:
-                    if f in self.cleaned_data:
-                        corp_kwargs[f] = self.cleaned_data.get(f)
-
-                # Handle gst_document file saving to MEDIA and include path if possible
-                from django.core.files.storage import default_storage
-                gst_file = self.files.get("gst_document") if hasattr(self, 'files') else None
-                if gst_file:
-                    save_path = default_storage.save(f"corporate_docs/{user.username}_gst_{gst_file.name}", gst_file)
-                    corp_kwargs["gst_document"] = save_path
-
-                # Save additional corporate documents
-                coi = self.files.get("certificate_of_incorporation") if hasattr(self, 'files') else None
-                if coi:
-                    corp_kwargs["certificate_of_incorporation"] = default_storage.save(
-                        f"corporate_docs/{user.username}_coi_{coi.name}", coi
-                    )
-                br = self.files.get("board_resolution") if hasattr(self, 'files') else None
-                if br:
-                    corp_kwargs["board_resolution"] = default_storage.save(
-                        f"corporate_docs/{user.username}_br_{br.name}", br
-                    )
-                csr = self.files.get("csr_mandate") if hasattr(self, 'files') else None
-                if csr:
-                    corp_kwargs["csr_mandate"] = default_storage.save(
-                        f"corporate_docs/{user.username}_csr_{csr.name}", csr
-                    )
-
-                CorporateLogin.objects.create(**corp_kwargs)
-            except TypeError:
+                paths = _save_uploads([
+                    (f"corporate_docs/{user.username}_{tag}_{files[field_name].name}", files[field_name])
+                    for field_name, tag in present
+                ])
+            except Exception:
+                present, paths = [], []
+            # User, wallet and legacy login rows commit together or not at all
+            with transaction.atomic():
+                user.save()
+                addr = cd.get("wallet_address")
+                # clean_wallet_address reports duplicates; the unique index settles races
                 try:
-                    CorporateLogin.objects.create(email=user.email, password=self.cleaned_data["password"])
+                    with transaction.atomic():
+                        Wallet.objects.create(user=user, address=addr)
+                except IntegrityError:
+                    raise forms.ValidationError({"wallet_address": ["This wallet address is already in use."]})
+                # Attempt to persist extended corporate info into legacy CorporateLogin if supported.
+                try:
+                    corp_kwargs = {"email": user.email, "password": cd["password"]}
+                    extra_fields = [
+                        "company_name",
+                        "cin",
+                        "gst_number",
+                        "company_pan",
+                        "pincode",
+                        "address",
+                        "taluka",
+                        "district",
+                        "state",
+                        "contact_person_name",
+                        "contact_number",
+                        "wallet_address",
+                    ]
+                    for f in extra_fields:
+                        if f in cd:
+                            corp_kwargs[f] = cd.get(f)
+
+                    for (field_name, _), path in zip(present, paths):
+                        corp_kwargs[field_name] = path
+
+                    with transaction.atomic():
+                        CorporateLogin.objects.create(**corp_kwargs)
+                except TypeError:
+                    try:
+                        with transaction.atomic():
+                            CorporateLogin.objects.create(email=user.email, password=cd["password"])
+                    except Exception:
+                        pass
                 except Exception:
+                    # ignore other creation errors
                     pass
-            except Exception:
-                # ignore other creation errors
-                pass
         return user
     def clean_wallet_address(self):
         addr = self.cleaned_data.get("wallet_address")
+        if addr and not _WALLET_RE.match(addr):
+            raise forms.ValidationError("Invalid wallet address format.")
         if addr and Wallet.objects.filter(address=addr).exists():
             raise forms.ValidationError("This wallet address is already registered.")
         return addr
@@ -355,15 +417,7 @@ class CorporateRegisterForm(forms.ModelForm):
     def clean_email(self):
         email = self.cleaned_data.get("email", "")
         # Basic domain-based verification: disallow common free email providers
-        blocked = {
-            "gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "live.com", "aol.com",
-            "icloud.com", "proton.me", "protonmail.com", "yandex.com", "rediffmail.com", "zoho.com",
-        }
-        try:
-            domain = email.split("@", 1)[1].lower()
-        except Exception:
-            return email
-        if domain in blocked:
+        if email.rpartition("@")[2].lower() in _BLOCKED_EMAIL_DOMAINS:
             raise forms.ValidationError("Please use your corporate email domain (not a public email provider).")
         return email
 
@@ -384,8 +438,11 @@ class CorporateRegisterForm(forms.ModelForm):
         # Enforce phone OTP verification via session (if request is provided)
         session = getattr(self, "request", None) and getattr(self.request, "session", None)
         phone = cleaned.get("contact_number")
-        if session and phone:
-            verified_phone = session.get("otp_phone_verified") and session.get("otp_verified_phone_value") == phone
+        if phone and not _PHONE_RE.match(phone):
+            self.add_error("contact_number", "Enter a valid phone number.")
+        elif session and phone:
+            otp = _otp_state(session)
+            verified_phone = otp["otp_phone_verified"] and otp["otp_verified_phone_value"] == phone
             if not verified_phone:
                 self.add_error("contact_number", "Please verify your phone via OTP before submitting.")
         return cleaned
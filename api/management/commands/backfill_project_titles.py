@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.models import Q
 
 class Command(BaseCommand):
@@ -6,27 +7,19 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         from api.models import Project
-        updated = 0
+        changed = []
         # Find projects with empty or null title
-        qs = Project.objects.filter(Q(title__isnull=True) | Q(title=""))
-        for p in qs:
-            # Try to infer a sensible title from other fields
-            fallback = None
-            # Historically, 'name' existed; if data was migrated via dump/load, it may linger in __dict__
-            if hasattr(p, 'name') and getattr(p, 'name'):
-                fallback = getattr(p, 'name')
-            if not fallback:
-                # Compose from species/location as last resort
-                parts = []
-                if getattr(p, 'species', None):
-                    parts.append(str(p.species))
-                if getattr(p, 'location', None):
-                    parts.append(str(p.location))
-                if parts:
-                    fallback = " - ".join(parts)
-                else:
-                    fallback = f"Project #{p.id}"
-            p.title = fallback
-            p.save(update_fields=["title"])
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Backfilled titles for {updated} project(s)."))
+        qs = (
+            Project.objects.filter(Q(title__isnull=True) | Q(title=""))
+            .values_list("id", "species", "location")
+        )
+        for pk, species, location in qs:
+            # Compose a title from species/location (the legacy 'name' column is gone)
+            parts = [str(v) for v in (species, location) if v]
+            title = " - ".join(parts) if parts else f"Project #{pk}"
+            changed.append(Project(id=pk, title=title))
+        # One batched UPDATE per 500 rows instead of a save() per project,
+        # all committed together
+        with transaction.atomic():
+            Project.objects.bulk_update(changed, ["title"], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Backfilled titles for {len(changed)} project(s)."))
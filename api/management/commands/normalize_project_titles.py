@@ -1,33 +1,45 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, Length, Lower, Reverse, StrIndex, Substr, Trim
 
 class Command(BaseCommand):
     help = "Normalize Project.title to remove appended location suffix (keeps the project name/species only)."
 
     def handle(self, *args, **options):
         from api.models import Project
-        updated = 0
-        checked = 0
-        for p in Project.objects.all().only('id', 'title', 'location', 'species'):
-            checked += 1
-            title = (p.title or '').strip()
-            location = (p.location or '').strip()
-            species = (p.species or '').strip()
-            if not title:
+        checked = Project.objects.count()
+        # The whole normalization is one set-wise UPDATE; no rows are loaded into Python
+        projects = (
+            Project.objects.annotate(
+                t=Coalesce(Trim('title'), Value('')),
+                loc=Coalesce(Trim('location'), Value('')),
+                sp=Coalesce(Trim('species'), Value('')),
+            )
+            # Split "<left> - <right>" at the last " - " (the separator reads the
+            # same reversed, so r is its 1-based position from the end, 0 if absent)
+            .annotate(r=StrIndex(Reverse('t'), Value(' - ')), n=Length('t'))
+            .annotate(
+                left=Trim(Substr('t', 1, Greatest(F('n') - F('r') - 2, Value(0)), output_field=CharField())),
+                right=Trim(Substr('t', F('n') - F('r') + 2, output_field=CharField())),
+            )
+            # Case-insensitive check for pattern "<something> - <location>"
+            .annotate(stripped=Case(
+                When(Q(r__gt=0) & ~Q(loc='') & Q(right__iexact=F('loc')) & ~Q(left=''), then=F('left')),
+                default=F('t'),
+                output_field=CharField(),
+            ))
+            .annotate(new=Case(
                 # If empty, prefer species; else fallback to generic
-                new_title = species or f"Project #{p.id}"
-            else:
-                new_title = title
-                # Case-insensitive check for pattern "<something> - <location>"
-                if ' - ' in title and location:
-                    left, sep, right = title.rpartition(' - ')
-                    if right.strip().lower() == location.lower():
-                        # If left matches species, prefer species; else keep left as provided name
-                        new_title = left.strip() or title
-                # Also handle exact title == location (rare)
-                if location and new_title.strip().lower() == location.lower():
-                    new_title = species or new_title
-            if new_title != title:
-                p.title = new_title
-                p.save(update_fields=['title'])
-                updated += 1
+                When(t='', sp='', then=Concat(Value('Project #'), Cast('id', CharField()), output_field=CharField())),
+                When(t='', then=F('sp')),
+                # Also handle a title that is just the location
+                When(Q(stripped__iexact=F('loc')) & ~Q(loc='') & ~Q(sp=''), then=F('sp')),
+                default=F('stripped'),
+                output_field=CharField(),
+            ))
+        )
+        with transaction.atomic():
+            # Rows whose normalized title is unchanged are neither written nor counted
+            updated = projects.exclude(new=F('t')).update(title=F('new'))
         self.stdout.write(self.style.SUCCESS(f"Normalized titles for {updated} of {checked} project(s)."))
@@ -6,32 +6,41 @@ from api.models import UserProfile
 class Command(BaseCommand):
     help = "Seed demo users for ISRO admin and Field Officer roles."
 
-    def handle(self, *args, **options):
-        # ISRO Admin
-        isro_email = "isro_admin@example.com"
-        isro_password = "isro12345"
-        isro_user, created = User.objects.get_or_create(
-            username=isro_email,
-            defaults={"email": isro_email}
+    def _ensure_user(self, email, password, is_staff=False):
+        user, created = User.objects.get_or_create(
+            username=email,
+            defaults={"email": email}
         )
         if created:
-            self.stdout.write(self.style.SUCCESS(f"Created user {isro_email}"))
-        isro_user.set_password(isro_password)
-        isro_user.is_staff = True
-        isro_user.save()
-        UserProfile.objects.update_or_create(user=isro_user, defaults={"role": "isro_admin"})
+            self.stdout.write(self.style.SUCCESS(f"Created user {email}"))
+        # Hashing is deliberately slow; only do it when the stored password differs
+        update_fields = []
+        if created or not user.check_password(password):
+            user.set_password(password)
+            update_fields.append("password")
+        if is_staff and not user.is_staff:
+            user.is_staff = True
+            update_fields.append("is_staff")
+        if update_fields:
+            user.save(update_fields=update_fields)
+        return user
+
+    def handle(self, *args, **options):
+        # ISRO Admin
+        isro_user = self._ensure_user("isro_admin@example.com", "isro12345", is_staff=True)
 
         # Field Officer
-        field_email = "field_officer@example.com"
-        field_password = "field12345"
-        field_user, created = User.objects.get_or_create(
-            username=field_email,
-            defaults={"email": field_email}
+        field_user = self._ensure_user("field_officer@example.com", "field12345")
+
+        # Upsert both profiles' roles in one INSERT ... ON CONFLICT statement
+        UserProfile.objects.bulk_create(
+            [
+                UserProfile(user=isro_user, role="isro_admin"),
+                UserProfile(user=field_user, role="field_officer"),
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["role"],
         )
-        if created:
-            self.stdout.write(self.style.SUCCESS(f"Created user {field_email}"))
-        field_user.set_password(field_password)
-        field_user.save()
-        UserProfile.objects.update_or_create(user=field_user, defaults={"role": "field_officer"})
 
         self.stdout.write(self.style.SUCCESS("Seeded: isro_admin@example.com / field_officer@example.com"))
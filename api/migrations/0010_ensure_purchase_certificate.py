@@ -1,6 +1,26 @@
 from django.db import migrations
 
 
+def add_certificate_column(apps, schema_editor):
+    # 0009 adds the column through the ORM; this only repairs Postgres
+    # databases where it went missing, and IF NOT EXISTS is Postgres syntax
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # SET LOCAL is scoped to the migration transaction: the ALTER gives up
+    # instead of queueing writes behind its ACCESS EXCLUSIVE lock
+    schema_editor.execute("SET LOCAL lock_timeout = '2s'")
+    schema_editor.execute("SET LOCAL statement_timeout = '30s'")
+    schema_editor.execute("ALTER TABLE api_purchase ADD COLUMN IF NOT EXISTS certificate varchar(100)")
+
+
+def drop_certificate_column(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("SET LOCAL lock_timeout = '2s'")
+    schema_editor.execute("SET LOCAL statement_timeout = '30s'")
+    schema_editor.execute("ALTER TABLE api_purchase DROP COLUMN IF EXISTS certificate")
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -8,14 +28,5 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.RunSQL(
-            sql="""
-            ALTER TABLE api_purchase
-            ADD COLUMN IF NOT EXISTS certificate varchar(100);
-            """,
-            reverse_sql="""
-            ALTER TABLE api_purchase
-            DROP COLUMN IF EXISTS certificate;
-            """,
-        ),
+        migrations.RunPython(add_certificate_column, drop_certificate_column),
     ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-15 22:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_blockchainconfig_chaintransaction_block_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaintransaction',
+            index=models.Index(fields=['-timestamp'], name='api_chaintx_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['-timestamp'], name='api_purchase_ts_idx'),
+        ),
+    ]
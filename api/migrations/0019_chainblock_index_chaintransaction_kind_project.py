@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-15 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_chaintransaction_purchase_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chainblock',
+            name='index',
+            field=models.IntegerField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='chaintransaction',
+            index=models.Index(fields=['kind', 'project_id'], name='api_chaintx_kind_proj_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-15 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_chainblock_index_chaintransaction_kind_project'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaintransaction',
+            index=models.Index(condition=models.Q(('tx_hash__gt', '')), fields=['-timestamp'], name='api_chaintx_onchain_ts_idx'),
+        ),
+    ]
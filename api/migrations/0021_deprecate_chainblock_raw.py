@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-15 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_chaintransaction_onchain_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chainblock',
+            name='raw',
+            field=models.JSONField(blank=True, help_text='Deprecated; blocks are rebuilt from their columns and transactions', null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-15 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_deprecate_chainblock_raw'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaintransaction',
+            index=models.Index(fields=['recipient', 'kind'], name='api_chaintx_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chaintransaction',
+            index=models.Index(fields=['sender', 'kind'], name='api_chaintx_sender_idx'),
+        ),
+    ]
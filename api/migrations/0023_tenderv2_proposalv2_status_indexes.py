@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-15 23:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_chaintransaction_ledger_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proposalv2',
+            index=models.Index(fields=['tender', 'status'], name='api_proposalv2_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenderv2',
+            index=models.Index(fields=['status', '-created_at'], name='api_tenderv2_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-15 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_blockchaintask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='certificate_status',
+            field=models.CharField(choices=[('none', 'Not requested'), ('pending', 'Generating'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=20),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 import secrets
+import uuid
 
 
 # --------------------
@@ -342,13 +343,24 @@ class SatelliteImage(models.Model):
 # Purchase & Credits
 # --------------------
 class Purchase(models.Model):
+    CERTIFICATE_STATUS_CHOICES = [
+        ("none", "Not requested"),
+        ("pending", "Generating"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
+
     corporate = models.ForeignKey(User, on_delete=models.CASCADE)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     credits = models.IntegerField()
     price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     certificate = models.FileField(upload_to="certificates/", null=True, blank=True)
+    certificate_status = models.CharField(max_length=20, choices=CERTIFICATE_STATUS_CHOICES, default="none")
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-timestamp"], name="api_purchase_ts_idx")]
+
     def __str__(self):
         return f"{self.corporate.username} bought {self.credits} from {self.project.title}"
 
@@ -523,12 +535,13 @@ class BlockchainConfig(models.Model):
 
 class ChainBlock(models.Model):
     """Persisted blockchain block for durability across restarts."""
-    index = models.IntegerField()
+    index = models.IntegerField(db_index=True)
     timestamp = models.FloatField()
     previous_hash = models.CharField(max_length=255, null=True, blank=True)
     nonce = models.IntegerField()
     hash = models.CharField(max_length=255)
-    raw = models.JSONField(null=True, blank=True)
+    # Deprecated: only blocks mined by older versions carry a value here
+    raw = models.JSONField(null=True, blank=True, help_text="Deprecated; blocks are rebuilt from their columns and transactions")
 
     class Meta:
         ordering = ["index"]
@@ -552,10 +565,41 @@ class ChainTransaction(models.Model):
     block_number = models.BigIntegerField(null=True, blank=True, help_text="Blockchain block number")
     gas_used = models.BigIntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-timestamp"], name="api_chaintx_ts_idx"),
+            models.Index(fields=["kind", "project_id"], name="api_chaintx_kind_proj_idx"),
+            models.Index(fields=["-timestamp"], condition=models.Q(tx_hash__gt=""), name="api_chaintx_onchain_ts_idx"),
+            models.Index(fields=["recipient", "kind"], name="api_chaintx_recipient_idx"),
+            models.Index(fields=["sender", "kind"], name="api_chaintx_sender_idx"),
+        ]
+
     def __str__(self):
         return f"{self.kind} {self.amount} -> {self.recipient}"
 
 
+class BlockchainTask(models.Model):
+    """A chain operation queued on the web3 worker pool.
+
+    State lives in the database so any worker process can answer a status poll.
+    """
+    STATE_CHOICES = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="blockchain_tasks")
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default="pending")
+    result = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.state})"
+
+
 # --------------------
 # Tendering System v2 (non-breaking, parallel to existing)
 # --------------------
@@ -577,6 +621,10 @@ class TenderV2(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Browse page: open / under-review tenders, newest first
+        indexes = [models.Index(fields=["status", "-created_at"], name="api_tenderv2_status_idx")]
+
     def __str__(self):
         return f"{self.tender_title} ({self.status})"
 
@@ -599,5 +647,8 @@ class ProposalV2(models.Model):
     chain_tx_hash = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["tender", "status"], name="api_proposalv2_status_idx")]
+
     def __str__(self):
         return f"Proposal by {self.contributor.username} for {self.tender.tender_title}"
@@ -12,7 +12,6 @@ from .emails import (
     SENDER_NAME,
     SENDER_TITLE,
     SUPPORT_EMAIL,
-    render_certificate_pdf,
     DEFAULT_FROM,
 )
 from django.template.loader import render_to_string
@@ -104,7 +103,7 @@ def notify_purchase(sender, instance: Purchase, created, **kwargs):
     remaining = max(total_issued - purchased, 0)
 
     # Build a small recent list (latest 5)
-    recent = Purchase.objects.filter(project=instance.project).order_by('-timestamp')[:5]
+    recent = Purchase.objects.filter(project=instance.project).select_related('corporate').order_by('-timestamp')[:5]
     recent_list = [
         {
             'id': p.id,
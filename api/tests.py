@@ -1,3 +1,329 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from . import blockchain_service, emails
+from .blockchain import Web3BlockchainManager
+from .blockchain_service import BlockchainService
+from .models import Project, Purchase, Wallet
+
+
+def _offline_manager():
+    """A Web3BlockchainManager that never connects to a node"""
+    with mock.patch.object(Web3BlockchainManager, '_initialize_web3'):
+        return Web3BlockchainManager()
+
+
+def _legacy_normalized_title(pk, title, location, species):
+    """The per-row rules normalize_project_titles implemented before it ran in SQL"""
+    title = (title or '').strip()
+    location = (location or '').strip()
+    species = (species or '').strip()
+    if not title:
+        return species or f"Project #{pk}"
+    new_title = title
+    if ' - ' in title and location:
+        left, sep, right = title.rpartition(' - ')
+        if right.strip().lower() == location.lower():
+            new_title = left.strip() or title
+    if location and new_title.strip().lower() == location.lower():
+        new_title = species or new_title
+    return new_title
+
+
+class NormalizeProjectTitlesTests(TestCase):
+    CASES = [
+        # (title, location, species)
+        ('Sundarbans', 'Sundarbans', 'Sundarbans'),
+        ('', 'Goa', 'Goa'),
+        ('', 'Goa', ''),
+        ('A - B - C', 'B - C', 'Avicennia'),
+        ('A - B - C', 'C', 'Avicennia'),
+        ('Mangrove Belt - goa', 'Goa', 'Rhizophora'),
+        ('Goa - Goa', 'Goa', 'Rhizophora'),
+        ('Goa - Goa', 'Goa', ''),
+        ('GOA', 'Goa', 'Rhizophora'),
+        (' - Goa', 'Goa', 'Rhizophora'),
+        ('  Mangrove Belt  ', 'Kerala', 'Rhizophora'),
+        ('Mangrove Belt -  Kerala', 'Kerala', 'Rhizophora'),
+        ('Mangrove Belt - Kerala', '', 'Rhizophora'),
+    ]
+
+    def setUp(self):
+        ngo = User.objects.create(username='ngo')
+        Project.objects.bulk_create([
+            Project(ngo=ngo, title=title, location=location, species=species, area=1)
+            for title, location, species in self.CASES
+        ])
+
+    def test_matches_legacy_rules(self):
+        projects = list(Project.objects.values_list('id', 'title', 'location', 'species'))
+        expected, changed = {}, 0
+        for pk, title, location, species in projects:
+            new_title = _legacy_normalized_title(pk, title, location, species)
+            # Rows the rules leave alone keep their stored title untouched
+            if new_title != (title or '').strip():
+                changed += 1
+                expected[pk] = new_title
+            else:
+                expected[pk] = title
+
+        out = StringIO()
+        call_command('normalize_project_titles', stdout=out)
+
+        self.assertEqual(dict(Project.objects.values_list('id', 'title')), expected)
+        self.assertIn(f"Normalized titles for {changed} of {len(projects)} project(s).", out.getvalue())
+
+    def test_unchanged_titles_are_not_counted(self):
+        call_command('normalize_project_titles', stdout=StringIO())
+        titles = dict(Project.objects.values_list('title', 'location'))
+        self.assertEqual(titles['Sundarbans'], 'Sundarbans')
+        self.assertIn('A - B - C', titles)
+
+        out = StringIO()
+        call_command('normalize_project_titles', stdout=out)
+
+        self.assertIn(f"Normalized titles for 0 of {len(self.CASES)} project(s).", out.getvalue())
+
+
+class SendTransactionNonceTests(SimpleTestCase):
+    def setUp(self):
+        self.manager = _offline_manager()
+        self.manager.account = mock.Mock(address='0x' + '1' * 40)
+        self.manager.config = mock.Mock(private_key='0x' + '2' * 64)
+        self.manager.w3 = mock.MagicMock()
+        self.eth = self.manager.w3.eth
+        self.eth.estimate_gas.return_value = 21000
+        self.eth.send_raw_transaction.return_value = b'\x01' * 32
+        self.eth.wait_for_transaction_receipt.return_value = mock.Mock(status=1)
+        self.batch = self.manager.w3.provider.make_batch_request
+        self.batch.side_effect = self._batch_response
+        self.node_nonce = 7
+        self.contract = mock.Mock(address='0x' + '3' * 40)
+        self.contract.encode_abi.return_value = '0x'
+
+    def _batch_response(self, calls):
+        results = {'eth_gasPrice': hex(10), 'eth_getTransactionCount': hex(self.node_nonce)}
+        return [{'result': results[method]} for method, _ in calls]
+
+    def _sent_nonces(self):
+        return [call.args[0]['nonce'] for call in self.eth.account.sign_transaction.call_args_list]
+
+    def _nonce_reads(self):
+        return sum(
+            method == 'eth_getTransactionCount'
+            for call in self.batch.call_args_list
+            for method, _ in call.args[0]
+        )
+
+    def test_nonce_is_tracked_locally_after_success(self):
+        self.manager._send_transaction(self.contract, 'mintCredits', [])
+        self.manager._send_transaction(self.contract, 'mintCredits', [])
+
+        self.assertEqual(self._sent_nonces(), [7, 8])
+        self.assertEqual(self._nonce_reads(), 1)
+        self.assertEqual(self.manager._nonce, 9)
+
+    def test_send_failure_resets_nonce(self):
+        self.eth.send_raw_transaction.side_effect = [ValueError('nonce too low'), b'\x01' * 32]
+
+        with self.assertRaises(ValueError):
+            self.manager._send_transaction(self.contract, 'mintCredits', [])
+        self.assertIsNone(self.manager._nonce)
+
+        self.node_nonce = 12
+        self.manager._send_transaction(self.contract, 'mintCredits', [])
+        self.assertEqual(self._sent_nonces(), [7, 12])
+        self.assertEqual(self._nonce_reads(), 2)
+
+    def test_reverted_transaction_resets_nonce(self):
+        self.eth.wait_for_transaction_receipt.return_value = mock.Mock(status=0)
+
+        tx_hash, receipt = self.manager._send_transaction(self.contract, 'mintCredits', [])
+
+        self.assertEqual(receipt.status, 0)
+        self.assertIsNone(self.manager._nonce)
+
+
+class EnsureWalletsTests(TestCase):
+    def setUp(self):
+        blockchain_service._wallet_cache.clear()
+        self.addCleanup(blockchain_service._wallet_cache.clear)
+        self.cached = User.objects.create(username='cached')
+        self.existing = User.objects.create(username='existing')
+        self.missing = User.objects.create(username='missing')
+        self.cached_address = blockchain_service._wallet_address(self.cached)
+        self.existing_address = Wallet.ensure(self.existing).address
+
+    def test_mixed_cached_existing_and_missing_users(self):
+        # One read for the uncached users, one insert and one re-read for the new wallet
+        with self.assertNumQueries(3):
+            addresses = BlockchainService.ensure_wallets([self.cached, self.existing, self.missing])
+
+        self.assertEqual(addresses[self.cached.id], self.cached_address)
+        self.assertEqual(addresses[self.existing.id], self.existing_address)
+        self.assertEqual(addresses[self.missing.id], Wallet.objects.get(user=self.missing).address)
+        self.assertEqual(Wallet.objects.count(), 3)
+
+    def test_results_are_cached(self):
+        BlockchainService.ensure_wallets([self.existing, self.missing])
+
+        with self.assertNumQueries(0):
+            addresses = BlockchainService.ensure_wallets([self.cached, self.existing, self.missing])
+        self.assertEqual(len(addresses), 3)
+
+    def test_edited_wallet_is_not_served_from_cache(self):
+        wallet = Wallet.objects.get(user=self.cached)
+        wallet.address = '0x' + 'a' * 40
+        wallet.save()
+
+        addresses = BlockchainService.ensure_wallets([self.cached])
+        self.assertEqual(addresses[self.cached.id], wallet.address)
+
+
+class BlockchainTaskStatusTests(TestCase):
+    def setUp(self):
+        self.manager = _offline_manager()
+        self.manager._executor.shutdown()
+        # Run tasks inline so their state update joins the test transaction
+        self.manager._executor = mock.Mock(submit=lambda fn: fn())
+        for patcher in (
+            mock.patch('api.views.get_blockchain_manager', return_value=self.manager),
+            mock.patch('api.blockchain.close_old_connections'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.owner = User.objects.create(username='owner')
+        self.other = User.objects.create(username='other')
+
+    def _run(self, fn):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = self.manager.submit(fn, owner_id=self.owner.id)
+        return task_id
+
+    def _status(self, user, task_id):
+        self.client.force_login(user)
+        return self.client.get(reverse('api_blockchain_task_status', args=[task_id]))
+
+    def test_owner_sees_result(self):
+        task_id = self._run(lambda: '0xabc')
+
+        response = self._status(self.owner, task_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task'], {'state': 'done', 'result': '0xabc'})
+
+    def test_status_is_readable_from_another_process(self):
+        task_id = self._run(lambda: '0xabc')
+
+        # A second manager stands in for another gunicorn worker
+        other_worker = _offline_manager()
+        self.addCleanup(other_worker._executor.shutdown)
+
+        self.assertEqual(other_worker.task_status(task_id, owner_id=self.owner.id), {'state': 'done', 'result': '0xabc'})
+
+    def test_unknown_task_gets_404(self):
+        self.assertEqual(self._status(self.owner, 'not-a-task').status_code, 404)
+
+    def test_other_user_gets_404(self):
+        task_id = self._run(lambda: '0xabc')
+
+        response = self._status(self.other, task_id)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('0xabc', response.content.decode())
+
+    def test_failure_hides_exception_text(self):
+        def fail():
+            raise RuntimeError('rpc password=secret')
+
+        with self.assertLogs('api.blockchain', level='ERROR'):
+            task_id = self._run(fail)
+
+        response = self._status(self.owner, task_id)
+
+        self.assertEqual(response.json()['task']['state'], 'failed')
+        self.assertNotIn('secret', response.content.decode())
+
+    def test_falsy_result_fails_task(self):
+        with self.assertLogs('api.blockchain', level='ERROR'):
+            task_id = self._run(lambda: None)
+
+        self.assertEqual(self.manager.task_status(task_id, owner_id=self.owner.id)['state'], 'failed')
+
+    def test_task_waits_for_commit(self):
+        fn = mock.Mock(return_value='0xabc')
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            task_id = self.manager.submit(fn, owner_id=self.owner.id)
+
+        self.assertEqual(self.manager.task_status(task_id, owner_id=self.owner.id), {'state': 'pending'})
+        fn.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+
+class CertificateStatusTests(TestCase):
+    def setUp(self):
+        corporate = Group.objects.create(name='Corporate')
+        self.buyer = User.objects.create(username='buyer')
+        self.buyer.groups.add(corporate)
+        self.other = User.objects.create(username='other')
+        self.other.groups.add(corporate)
+        ngo = User.objects.create(username='ngo')
+        project = Project.objects.create(ngo=ngo, title='Mangrove Belt', location='Goa', species='Rhizophora', area=1)
+        self.purchase = Purchase.objects.create(corporate=self.buyer, project=project, credits=1)
+        for patcher in (
+            mock.patch.object(emails, '_CERT_POOL', mock.Mock(submit=lambda fn, *args: fn(*args))),
+            mock.patch('api.emails.close_old_connections'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _request(self):
+        self.client.force_login(self.buyer)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(reverse('request_certificate', args=[self.purchase.id]))
+        return response, callbacks
+
+    def _status(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse('certificate_status', args=[self.purchase.id]))
+
+    def test_request_is_pending_until_generated(self):
+        response, callbacks = self._request()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()['pending'])
+        self.assertEqual(self._status(self.buyer).json(), {'status': 'pending'})
+        self.assertEqual(len(callbacks), 1)
+
+    def test_ready_certificate_has_download_url(self):
+        _, callbacks = self._request()
+
+        def render(purchase):
+            Purchase.objects.filter(pk=purchase.pk).update(certificate='certificates/test.pdf')
+            return 'certificates/test.pdf'
+
+        with mock.patch.object(emails, 'render_certificate_pdf', side_effect=render), \
+                mock.patch.object(emails, '_email_certificate'):
+            callbacks[0]()
+
+        self.assertEqual(self._status(self.buyer).json(), {
+            'status': 'ready',
+            'download_url': reverse('download_certificate', args=[self.purchase.id]),
+        })
+
+    def test_render_failure_is_recorded(self):
+        _, callbacks = self._request()
+
+        with mock.patch.object(emails, 'render_certificate_pdf', return_value=None), \
+                self.assertLogs('api.emails', level='ERROR'):
+            callbacks[0]()
+
+        self.assertEqual(self._status(self.buyer).json(), {'status': 'failed'})
+
+    def test_other_user_is_refused(self):
+        self.assertEqual(self._status(self.other).status_code, 403)
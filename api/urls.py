@@ -24,6 +24,7 @@ urlpatterns = [
     path("api/otp/verify-phone/", views.verify_phone_otp, name="verify_phone_otp"),
     path("blockchain/", views.blockchain_explorer, name="blockchain_explorer"),
     path("api/blockchain/status/", views.api_blockchain_status, name="api_blockchain_status"),
+    path("api/blockchain/tasks/<str:task_id>/", views.api_blockchain_task_status, name="api_blockchain_task_status"),
     path("admin/blockchain/status/", views.blockchain_status, name="blockchain_status"),
     path("api/wallet/info/", views.user_wallet_info, name="user_wallet_info"),
 
@@ -75,6 +76,7 @@ urlpatterns = [
     path("corporate/purchase/<int:project_id>/", views.purchase_credits, name="purchase_credits"),
     path("corporate/certificate/<int:purchase_id>/download/", views.download_certificate, name="download_certificate"),
     path("corporate/certificate/<int:purchase_id>/request/", views.request_certificate, name="request_certificate"),
+    path("corporate/certificate/<int:purchase_id>/status/", views.certificate_status, name="certificate_status"),
 
     # Tenders
     path("corporate/tenders/", views.tenders_list, name="tenders_list"),
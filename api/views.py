@@ -14,7 +14,7 @@ from .models import (
     FieldImage, SatelliteImageSubmission, SatelliteImage
 )
 from .forms import NGORegisterForm, CorporateRegisterForm, TenderForm, TenderApplicationForm, TenderV2Form, ProposalV2Form
-from .blockchain import get_chain
+from .blockchain import get_blockchain_manager
 from .blockchain_service import BlockchainService
 from .forms import ProjectForm
 import joblib
@@ -488,8 +488,9 @@ def request_certificate(request, purchase_id):
     """On-demand certificate generation and email sending for a purchase.
 
     POST only. Ensures the logged-in corporate user owns the purchase.
-    Calls render_certificate_pdf (from api.emails) to produce and save PDF and
-    then emails it to the buyer.
+    The PDF is rendered and emailed to the buyer in the background; the
+    purchase's certificate_status is "pending" until then and ends up
+    "ready" or "failed"; certificate_status reports it to the dashboard.
     """
     if request.method != "POST":
         return HttpResponseForbidden("POST required")
@@ -499,49 +500,28 @@ def request_certificate(request, purchase_id):
         return HttpResponseForbidden("Not allowed")
 
     # Lazy import to avoid circular imports at module import time
-    from .emails import render_certificate_pdf, DEFAULT_FROM
-    from django.core.mail import EmailMultiAlternatives
-    from django.template.loader import render_to_string
-    from django.utils.html import strip_tags
-    from django.core.files.storage import default_storage
+    from .emails import queue_certificate
 
-    cert_path = render_certificate_pdf(purchase)
-    if not cert_path:
-        logging.exception("Certificate generation failed for purchase %s", purchase_id)
-        return JsonResponse({"ok": False, "error": "Certificate generation failed"}, status=500)
+    Purchase.objects.filter(pk=purchase.pk).update(certificate_status="pending")
+    queue_certificate(purchase)
 
-    # Build and send email with attachment
-    try:
-        ctx = {
-            'ngo_name': purchase.project.ngo.get_full_name() or purchase.project.ngo.username,
-            'company_name': purchase.corporate.get_full_name() or purchase.corporate.username,
-            'credits': purchase.credits,
-            'transaction_id': purchase.id,
-            'purchase_date': purchase.timestamp,
-            'dashboard_link': settings.DASHBOARD_URL if hasattr(settings, 'DASHBOARD_URL') else 'http://127.0.0.1:8080/',
-            'org_name': getattr(settings, 'ORG_NAME', 'BlueQuant'),
-        }
-        subject = f"Your Certificate for Purchase #{purchase.id}"
-        html = render_to_string('api/emails/corporate_purchase_confirmation.html', ctx)
-        text = strip_tags(html)
-        buyer_email = purchase.corporate.email or purchase.corporate.username
-        msg = EmailMultiAlternatives(subject, text, DEFAULT_FROM, [buyer_email])
-        msg.attach_alternative(html, 'text/html')
-        with default_storage.open(cert_path, 'rb') as f:
-            msg.attach(f'certificate_{purchase.id}.pdf', f.read(), 'application/pdf')
+    status_url = reverse('certificate_status', args=[purchase.id])
+    return JsonResponse({"ok": True, "pending": True, "message": "Certificate is being generated and will be emailed to you.", "status_url": status_url}, status=202)
 
-        # Propagate SMTP/send errors so we can report back
-        sent = msg.send(fail_silently=False)
-        if not sent:
-            logging.error('Email sent returned 0 for purchase %s to %s', purchase_id, buyer_email)
-            return JsonResponse({"ok": False, "error": "Email not sent"}, status=500)
 
-    except Exception as exc:
-        logging.exception("Failed sending certificate email for purchase %s: %s", purchase_id, exc)
-        return JsonResponse({"ok": False, "error": "Failed to send email"}, status=500)
+@login_required
+@user_passes_test(is_corporate)
+def certificate_status(request, purchase_id):
+    """Report the certificate generation state of a purchase as JSON."""
+    purchase = get_object_or_404(Purchase, pk=purchase_id)
+    if purchase.corporate_id != request.user.id:
+        return HttpResponseForbidden("Not allowed")
 
-    download_url = reverse('download_certificate', args=[purchase.id])
-    return JsonResponse({"ok": True, "message": "Certificate generated and emailed", "download_url": download_url})
+    data = {"status": purchase.certificate_status}
+    if purchase.certificate:
+        data["status"] = "ready"
+        data["download_url"] = reverse('download_certificate', args=[purchase.id])
+    return JsonResponse(data)
 
 
 # --------------------
@@ -1294,19 +1274,21 @@ def purchase_credits(request, project_id):
             Purchase.objects.create(corporate=request.user, project=project, credits=credits)
             project.credits -= credits
             project.save(update_fields=["credits"])
-            # Chain transfer (buyer -> seller)
+            # Chain transfer (buyer -> seller) runs in the background so the
+            # request does not wait for the receipt; the dashboard polls it
             # Use BlockchainService to ensure proper transaction recording
             from .blockchain_service import BlockchainService
-            tx_hash = BlockchainService.transfer_credits(project.ngo, request.user, credits, project.id)
-            if tx_hash:
-                logger.info(f"Credits purchased: {tx_hash}")
-            else:
-                logger.error("Failed to transfer credits on blockchain")
+            task_id = get_blockchain_manager().submit(
+                BlockchainService.transfer_credits, project.ngo, request.user, credits, project.id,
+                owner_id=request.user.id,
+            )
+            logger.info(f"Credit purchase transfer queued: {task_id}")
             messages.success(
                 request,
-                f"Purchased {credits} credits from project '{project.title}'."
+                f"Purchased {credits} credits from project '{project.title}'. "
+                "The blockchain transfer is being processed."
             )
-            return redirect("corporate_dashboard")
+            return redirect(f"{reverse('corporate_dashboard')}?transfer_task={task_id}")
 
     return render(request, "api/marketplace/purchase_modal.html", {"project": project})
 
@@ -1384,8 +1366,7 @@ def tender_accept(request, tender_id, application_id):
                 logger.info(f"Tender credits transferred: {tx_hash}")
             else:
                 logger.error("Failed to transfer tender credits on blockchain")
-            chain = get_chain()
-            # store surrogate hash only if ChainTransaction exists for v1? We skip storing on app to keep schema clean
+            # v1 applications do not store the tx hash, to keep the schema clean
     except Exception:
         pass
     app.save(update_fields=["status"]) 
@@ -1545,10 +1526,7 @@ def tender_v2_accept(request, tender_id, proposal_id):
             logger.info(f"Tender v2 credits transferred: {tx_hash}")
         else:
             logger.error("Failed to transfer tender v2 credits on blockchain")
-        # attempt to fetch last block hash as tx hash surrogate
-        chain = get_chain()
-        last_hash = chain[-1].get('hash') if chain else ''
-        proposal.chain_tx_hash = last_hash or ''
+        proposal.chain_tx_hash = tx_hash or ''
     except Exception:
         proposal.chain_tx_hash = ''
     proposal.save(update_fields=["status", "chain_tx_hash"])
@@ -2344,6 +2322,21 @@ def api_blockchain_status(request):
         }, status=500)
 
 
+@login_required
+def api_blockchain_task_status(request, task_id):
+    """Poll the result of a background blockchain operation"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'GET required'}, status=405)
+    
+    task = get_blockchain_manager().task_status(task_id, owner_id=request.user.id)
+    if task['state'] == 'unknown':
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    return JsonResponse({
+        'success': True,
+        'task': task
+    })
+
+
 @login_required
 def user_wallet_info(request):
     """Get current user's wallet information and balance"""
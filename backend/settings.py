@@ -70,13 +70,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
     'DIRS': [BASE_DIR / 'api' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Keep compiled templates (emails, certificates) in memory in every
+            # environment; runserver's autoreloader still resets this on edits
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -109,6 +116,9 @@ _clean = _raw_db.strip().strip('"').strip("'")
 os.environ["DATABASE_URL"] = _clean
 try:
     DATABASES = {"default": env.db("DATABASE_URL")}
+    # Keep connections open across requests instead of reconnecting (TCP + TLS +
+    # auth) every time; set CONN_MAX_AGE=0 when running behind pgbouncer.
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
     # Enable persistent connection health checks to prevent SSL errors
     DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
 except Exception as e:
@@ -133,6 +143,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Argon2 (argon2-cffi, pinned in requirements.txt) hashes new passwords; the
+# remaining Django defaults keep existing hashes valid and are upgraded on login
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/